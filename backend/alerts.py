@@ -0,0 +1,212 @@
+"""
+Fleet-wide usage alerts for every house × appliance
+Rolling statistics (EWMA, EW variance, per-hour baselines) are updated incrementally
+as readings are ingested; alerts are evaluated from that state in vectorized passes
+"""
+import numpy as np
+import pandas as pd
+
+# EWMA smoothing: span of one day of hourly readings
+DEFAULT_ALPHA = 2 / (24 + 1)
+# Readings more than this many standard deviations above the hour-of-day baseline are spikes
+DEFAULT_Z_THRESHOLD = 3.0
+# Smoothed usage this far above the long-run mean counts as sustained high usage
+DEFAULT_DRIFT_THRESHOLD = 0.25
+# Readings needed per house/appliance before sustained-usage alerts fire (EWMA warm-up)
+DEFAULT_MIN_READINGS = 48
+# Earlier readings at the same hour of day needed before a reading can be a spike
+DEFAULT_MIN_HOUR_READINGS = 3
+# Cells (timestamps × houses × appliances) in the dense working array during ingest
+INGEST_CHUNK_CELLS = 4_000_000
+
+
+class AlertEngine:
+    """
+    Incremental rolling statistics per (house, appliance), all held as numpy arrays:
+      ewma, ewvar             exponentially weighted mean / variance of the readings
+      last_z                  rolling z-score of the latest reading against the EWMA before it
+      last_value_hour         hour of day of each house/appliance's latest reading
+      hour_sum, hour_sq, hour_count   per (house, hour-of-day) baseline accumulators
+    """
+
+    def __init__(self, appliance_map, alpha=DEFAULT_ALPHA, z_threshold=DEFAULT_Z_THRESHOLD,
+                 drift_threshold=DEFAULT_DRIFT_THRESHOLD, min_readings=DEFAULT_MIN_READINGS,
+                 min_hour_readings=DEFAULT_MIN_HOUR_READINGS):
+        self.appliance_map = dict(appliance_map)
+        self.appliances = list(self.appliance_map)
+        self.columns = list(self.appliance_map.values())
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.drift_threshold = drift_threshold
+        self.min_readings = min_readings
+        self.min_hour_readings = min_hour_readings
+
+        self.houses = []
+        self.house_index = {}
+        n_apps = len(self.columns)
+        self.ewma = np.zeros((0, n_apps))
+        self.ewvar = np.zeros((0, n_apps))
+        self.count = np.zeros((0, n_apps), dtype=np.int64)
+        self.last_value = np.full((0, n_apps), np.nan)
+        self.last_z = np.full((0, n_apps), np.nan)
+        self.last_value_hour = np.zeros((0, n_apps), dtype=np.int64)
+        self.last_hour = np.zeros(0, dtype=np.int64)
+        self.last_timestamp = np.zeros(0, dtype='datetime64[ns]')
+        self.hour_sum = np.zeros((0, 24, n_apps))
+        self.hour_sq = np.zeros((0, 24, n_apps))
+        self.hour_count = np.zeros((0, 24, n_apps))
+        self.active = []
+
+    def _add_houses(self, house_ids):
+        """Grow the state arrays for houses seen for the first time."""
+        new = [h for h in pd.unique(np.asarray(house_ids)) if h not in self.house_index]
+        if not new:
+            return
+        for h in new:
+            self.house_index[h] = len(self.houses)
+            self.houses.append(h)
+        n = len(new)
+
+        def grow(arr, fill):
+            pad = np.full((n,) + arr.shape[1:], fill, dtype=arr.dtype)
+            return np.concatenate([arr, pad])
+
+        self.ewma = grow(self.ewma, 0.0)
+        self.ewvar = grow(self.ewvar, 0.0)
+        self.count = grow(self.count, 0)
+        self.last_value = grow(self.last_value, np.nan)
+        self.last_z = grow(self.last_z, np.nan)
+        self.last_value_hour = grow(self.last_value_hour, 0)
+        self.last_hour = grow(self.last_hour, 0)
+        self.last_timestamp = grow(self.last_timestamp, np.datetime64('NaT'))
+        self.hour_sum = grow(self.hour_sum, 0.0)
+        self.hour_sq = grow(self.hour_sq, 0.0)
+        self.hour_count = grow(self.hour_count, 0.0)
+
+    def ingest(self, data):
+        """
+        Fold new readings (timestamp, house_id and appliance columns) into the rolling state.
+        Readings at or before a house's latest ingested timestamp are ignored, so
+        re-ingesting overlapping data is safe. Re-evaluates alerts afterwards.
+        """
+        if len(data) == 0:
+            return self.active
+        self._add_houses(data["house_id"])
+
+        house = np.fromiter((self.house_index[h] for h in data["house_id"]), dtype=np.int64,
+                            count=len(data))
+        timestamps = data["timestamp"].to_numpy(dtype='datetime64[ns]')
+        last = self.last_timestamp[house]
+        fresh = np.isnat(last) | (timestamps > last)
+        if not fresh.any():
+            return self.active
+
+        house = house[fresh]
+        timestamps = timestamps[fresh]
+        values = data[self.columns].to_numpy(dtype=np.float64)[fresh]
+        hours = pd.DatetimeIndex(timestamps).hour.to_numpy()
+
+        # Per-hour baselines: order-independent, one vectorized scatter-add
+        present = ~np.isnan(values)
+        filled = np.where(present, values, 0.0)
+        np.add.at(self.hour_sum, (house, hours), filled)
+        np.add.at(self.hour_sq, (house, hours), filled ** 2)
+        np.add.at(self.hour_count, (house, hours), present)
+
+        # EWMA / EW variance: one vectorized step per timestamp over all houses × appliances
+        times, time_code = np.unique(timestamps, return_inverse=True)
+        order = np.argsort(time_code, kind='stable')
+        boundaries = np.searchsorted(time_code[order], np.arange(len(times) + 1))
+        n_houses, n_apps = self.ewma.shape
+        chunk = max(1, INGEST_CHUNK_CELLS // (n_houses * n_apps))
+        for chunk_start in range(0, len(times), chunk):
+            chunk_end = min(chunk_start + chunk, len(times))
+            rows = order[boundaries[chunk_start]:boundaries[chunk_end]]
+            # Dense (time, house, appliance) cube for this chunk; NaN = no reading
+            cube = np.full((chunk_end - chunk_start, n_houses, n_apps), np.nan)
+            cube[time_code[rows] - chunk_start, house[rows]] = values[rows]
+            hour_cube = np.full((chunk_end - chunk_start, n_houses), -1)
+            hour_cube[time_code[rows] - chunk_start, house[rows]] = hours[rows]
+            for step in range(chunk_end - chunk_start):
+                self._step(cube[step], hour_cube[step], times[chunk_start + step])
+
+        self.active = self.evaluate()
+        return self.active
+
+    def _step(self, x, hour, timestamp):
+        """Advance the EW statistics by one timestamp; x is (houses, appliances) with NaN gaps."""
+        present = ~np.isnan(x)
+        first = present & (self.count == 0)
+        diff = np.where(present, x - self.ewma, 0.0)
+        std = np.sqrt(self.ewvar)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = np.where(std > 0, diff / std, 0.0)
+        self.last_z = np.where(present & ~first, z, self.last_z)
+
+        incr = self.alpha * diff
+        self.ewma = np.where(first, x, np.where(present, self.ewma + incr, self.ewma))
+        self.ewvar = np.where(
+            first, 0.0,
+            np.where(present, (1 - self.alpha) * (self.ewvar + diff * incr), self.ewvar)
+        )
+        self.count += present
+        self.last_value = np.where(present, x, self.last_value)
+        self.last_value_hour = np.where(present, hour[:, None], self.last_value_hour)
+
+        seen = hour >= 0
+        self.last_hour = np.where(seen, hour, self.last_hour)
+        self.last_timestamp = np.where(seen, timestamp, self.last_timestamp)
+
+    def evaluate(self):
+        """Evaluate every house × appliance from the rolling state (no history scan)."""
+        if not self.houses:
+            return []
+        rows = np.arange(len(self.houses))[:, None]
+        apps = np.arange(len(self.columns))[None, :]
+        hour = self.last_value_hour
+        # Hour-of-day baseline without the latest reading itself (ingest has already added
+        # it), so a spike cannot dilute its own baseline
+        present = ~np.isnan(self.last_value)
+        latest = np.where(present, self.last_value, 0.0)
+        hour_sum = self.hour_sum[rows, hour, apps] - latest
+        hour_sq = self.hour_sq[rows, hour, apps] - latest ** 2
+        hour_count = self.hour_count[rows, hour, apps] - present
+        with np.errstate(invalid='ignore', divide='ignore'):
+            hour_mean = hour_sum / hour_count
+            # Sample variance: a handful of same-hour readings would understate the spread
+            hour_var = (hour_sq - hour_count * hour_mean ** 2) / (hour_count - 1)
+            hour_std = np.sqrt(np.clip(hour_var, 0, None))
+            hour_z = (self.last_value - hour_mean) / hour_std
+            long_run_mean = self.hour_sum.sum(axis=1) / self.hour_count.sum(axis=1)
+            ratio = self.ewma / long_run_mean
+
+        # Spikes need enough same-hour history; sustained usage needs a warmed-up EWMA
+        spike = (hour_count >= self.min_hour_readings) & (hour_std > 0) & (hour_z >= self.z_threshold)
+        sustained = (self.count >= self.min_readings) & ~spike & (ratio >= 1 + self.drift_threshold)
+        severe = spike & (self.last_z >= self.z_threshold)
+
+        alerts = []
+        for kind, mask in (("spike", spike), ("sustained_high", sustained)):
+            for h, a in np.argwhere(mask):
+                alerts.append({
+                    "house_id": str(self.houses[h]),
+                    "appliance": self.appliances[a],
+                    "type": kind,
+                    "severity": "high" if kind == "spike" and severe[h, a] else "moderate",
+                    "value": float(self.last_value[h, a]),
+                    "ewma": float(self.ewma[h, a]),
+                    "hourBaseline": float(hour_mean[h, a]),
+                    "hourZScore": float(hour_z[h, a]),
+                    "rollingZScore": float(self.last_z[h, a]),
+                    "ratioToLongRun": float(ratio[h, a]),
+                    "timestamp": str(pd.Timestamp(self.last_timestamp[h])),
+                })
+        return alerts
+
+    def summary(self):
+        """Counts for the alerts endpoint."""
+        return {
+            "houses": len(self.houses),
+            "appliances": len(self.appliances),
+            "active": len(self.active),
+        }
@@ -1,36 +1,25 @@
 from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
-import pandas as pd
 import os
-import pickle
-import json
-import numpy as np
-from datetime import datetime, timedelta, date
+from datetime import timedelta, date
 import calendar
 
-app = Flask(__name__)
-CORS(app)  # Enable CORS for React frontend
+# Only light modules here: numpy/pandas/sklearn, the dataset and the models are
+# loaded by the data layer (in the background, or on the first request that needs them)
+from appliances import APPLIANCE_COLUMNS
+from payloads import ColumnarPayload, chart_response, compress_response
+from startup import LazyLoader, StartupTimer
+
+startup_timer = StartupTimer()
+
+with startup_timer.phase("flask app"):
+    app = Flask(__name__)
+    CORS(app)  # Enable CORS for React frontend
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "model", "appliance_usage_dataset.csv")
 MODEL_DIR = os.path.join(BASE_DIR, "model", "trained_models")
 
-# Load data
-df = pd.read_csv(DATA_PATH)
-
-# Convert timestamp
-df["timestamp"] = pd.to_datetime(df["timestamp"], dayfirst=True)
-df["hour"] = df["timestamp"].dt.hour
-df["day"] = df["timestamp"].dt.day
-df["month"] = df["timestamp"].dt.month
-df["year"] = df["timestamp"].dt.year
-df["festival"] = df["festival"].fillna('No_Festival')
-
-# ML models and encoders (lazy load models to speed startup)
-models = {}  # Cache of loaded models
-encoders = {}
-model_accuracies = {}
-
 # Appliances list (shared across app)
 APPLIANCE_NAMES = [
     "AC", "Fridge", "Lights", "Fan", "Washing Machine", "TV",
@@ -39,90 +28,79 @@ APPLIANCE_NAMES = [
     "Refrigerator", "Freezer", "Air Purifier", "Humidifier", "Dehumidifier"
 ]
 
-# Map appliance name to model path for lazy loading
-model_paths = {
-    name: os.path.join(MODEL_DIR, f"{name.lower().replace(' ', '_')}_model.pkl")
-    for name in APPLIANCE_NAMES
-}
-
-try:
-    # Load encoders (small, safe to load at startup)
-    encoders_path = os.path.join(MODEL_DIR, "encoders.pkl")
-    if os.path.exists(encoders_path):
-        with open(encoders_path, 'rb') as f:
-            encoders = pickle.load(f)
-    
-    # Load accuracies (metadata only)
-    accuracies_path = os.path.join(MODEL_DIR, "accuracies.json")
-    if os.path.exists(accuracies_path):
-        with open(accuracies_path, 'r') as f:
-            model_accuracies = json.load(f)
-    
-    print(f"Encoders loaded: {len(encoders.keys()) if encoders else 0}")
-    print(f"Model metadata found for {len(model_paths)} appliances")
-except Exception as e:
-    print(f"Warning: Could not load encoders/accuracies: {e}")
-    print("Will use statistical prediction instead")
-
-def count_models_on_disk():
-    """Count how many trained model files exist on disk."""
-    return sum(1 for p in model_paths.values() if p and os.path.exists(p))
-
-def has_encoders_on_disk():
-    """Whether the encoders.pkl exists on disk (required to use ML path)."""
-    return os.path.exists(os.path.join(MODEL_DIR, "encoders.pkl"))
-
-
-def load_model(appliance_name):
-    """
-    Lazily load a model for the given appliance.
-    Returns the model instance or None if not available.
-    """
-    if appliance_name in models:
-        return models[appliance_name]
-    
-    model_path = model_paths.get(appliance_name)
-    if not model_path or not os.path.exists(model_path):
-        return None
-    
-    try:
-        with open(model_path, 'rb') as f:
-            models[appliance_name] = pickle.load(f)
-        print(f"Loaded model for {appliance_name}")
-        return models[appliance_name]
-    except Exception as e:
-        print(f"Error loading model for {appliance_name}: {e}")
-        return None
-
 # Appliance mapping (dropdown → dataset column)
 # 20 appliances - removed 10 less-used ones (Iron, Hair Dryer, Vacuum, Coffee Maker, Toaster, Blender, Kettle, Router, Security, Smart Hub)
-APPLIANCE_MAP = {
-    "AC": "ac",
-    "Fridge": "fridge",
-    "Lights": "lights",
-    "Fan": "fans",
-    "Washing Machine": "washing_machine",
-    "TV": "tv",
-    "Microwave": "microwave",
-    "Oven": "oven",
-    "Dishwasher": "dishwasher",
-    "Water Heater": "water_heater",
-    "Dryer": "dryer",
-    "Computer": "computer",
-    "Motor": "motor",
-    "Sound System": "sound_system",
-    "Electric Stove": "stove",
-    "Refrigerator": "refrigerator",
-    "Freezer": "freezer",
-    "Air Purifier": "air_purifier",
-    "Humidifier": "humidifier",
-    "Dehumidifier": "dehumidifier"
+APPLIANCE_MAP = APPLIANCE_COLUMNS
+
+# Serve pruned/quantized forests from compress_models.py when present (low-memory boxes)
+USE_COMPACT_MODELS = os.environ.get("USE_COMPACT_MODELS", "0") == "1"
+# Warm the data layer in a background thread at startup ("0": build it on the first request)
+BACKGROUND_LOAD = os.environ.get("BACKGROUND_LOAD", "1") == "1"
+
+
+def load_runtime():
+    """Dataset, history store, alert engine and model registry (the slow part of startup)."""
+    from data_layer import DataLayer
+    poll_seconds = os.environ.get("MODEL_POLL_SECONDS")
+    # Per-house model shards kept in memory per model version (LRU)
+    house_shard_cache = os.environ.get("HOUSE_SHARD_CACHE")
+    runtime = DataLayer(
+        DATA_PATH, MODEL_DIR, APPLIANCE_NAMES, APPLIANCE_MAP, startup_timer,
+        prefer_compact=USE_COMPACT_MODELS,
+        poll_seconds=float(poll_seconds) if poll_seconds is not None else None,
+        house_shard_cache=int(house_shard_cache) if house_shard_cache is not None else None
+    )
+    model_set = runtime.model_registry.current
+    print(f"Dataset loaded: {len(runtime.df):,} rows")
+    print(f"Model version: {model_set.version or 'unversioned'}")
+    print(f"Encoders loaded: {len(model_set.encoders)}")
+    print(f"Model metadata found for {len(model_set.model_paths)} appliances")
+    return runtime
+
+
+runtime_loader = LazyLoader(load_runtime, name="data-layer")
+
+
+def runtime():
+    """The loaded data layer; blocks until the background load finishes."""
+    return runtime_loader.get()
+
+
+def create_app(background_load=None):
+    """Return the app, starting the data layer warmup unless disabled."""
+    if BACKGROUND_LOAD if background_load is None else background_load:
+        runtime_loader.start_background()
+    return app
+
+
+HISTORY_LABEL_FORMATS = {
+    "hour": "%Y-%m-%dT%H:00",
+    "day": "%Y-%m-%d",
+    "week": "%Y-%m-%d",
+    "month": "%Y-%m",
+    "year": "%Y",
 }
 
+@app.after_request
+def compress_json_response(response):
+    """gzip/brotli-compress large JSON responses for clients that accept it"""
+    return compress_response(request, response)
+
+
 @app.route("/")
 def home():
     return render_template("index.html")
 
+
+@app.route("/health", methods=["GET"])
+def health():
+    """Liveness plus data layer readiness and the startup phase timings (never blocks)"""
+    status = "ready" if runtime_loader.ready else "failed" if runtime_loader.failed else "loading"
+    return jsonify({
+        "status": status,
+        "startup": startup_timer.report()
+    }), 503 if status == "failed" else 200
+
 @app.route("/predict_new_workflow", methods=["POST"])
 def predict_new_workflow_route():
     """Endpoint for new workflow: multiple appliances, historical range, and prediction"""
@@ -152,6 +130,65 @@ def predict_new_workflow_route():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/history", methods=["POST"])
+def history_route():
+    """Historical usage over any date span, on one shared time axis with a bounded point count"""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({"error": "Request body must be non-empty JSON"}), 400
+    
+    appliances = data.get("appliances")
+    if not isinstance(appliances, list) or len(appliances) == 0:
+        return jsonify({"error": "appliances must be a non-empty list"}), 400
+    
+    rt = runtime()  # before importing history, so the data layer's timed phases include numpy/pandas
+    from history import DEFAULT_MAX_POINTS
+    max_points = data.get("maxPoints")
+    try:
+        max_points = DEFAULT_MAX_POINTS if max_points is None else int(max_points)
+    except (TypeError, ValueError):
+        return jsonify({"error": "maxPoints must be an integer"}), 400
+    
+    try:
+        result = rt.history_store.query(
+            appliances,
+            start=data.get("start"),
+            end=data.get("end"),
+            resolution=data.get("resolution", "auto"),
+            max_points=max_points,
+            method=data.get("method", "mean"),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    series_columns = {}
+    for name, series in result["series"].items():
+        for key, values in series.items():
+            series_columns[name if key == "values" else f"{name}.{key}"] = values
+    payload = ColumnarPayload(
+        result["timestamps"],
+        series_columns,
+        meta={key: result[key] for key in ("start", "end", "resolution", "downsampled")}
+    )
+    return chart_response(request, payload, lambda: history_payload(result))
+
+
+def history_payload(result):
+    """JSON-ready form of a HistoryStore.query result."""
+    label_format = HISTORY_LABEL_FORMATS[result["resolution"]]
+    return {
+        "start": result["start"],
+        "end": result["end"],
+        "resolution": result["resolution"],
+        "downsampled": result["downsampled"],
+        "timestamps": [str(t) for t in result["timestamps"].strftime(label_format)],
+        "series": {
+            name: {key: values.tolist() for key, values in series.items()}
+            for name, series in result["series"].items()
+        },
+    }
+
+
 @app.route("/predict", methods=["POST"])
 def predict():
     # Support both form data and JSON
@@ -177,6 +214,7 @@ def predict():
         season = request.form["season"]
 
     col = APPLIANCE_MAP[appliance]
+    df = runtime().df
 
     # -------- DAILY (hour-wise for selected day) --------
     daily_df = df[
@@ -228,18 +266,42 @@ def predict():
     })
 
 
+def requested_quantiles(data):
+    """
+    Quantiles for prediction bands, or None for point predictions only.
+    "intervals": true uses the default 5% / 50% / 95%; "quantiles": [...] picks them.
+    """
+    from uncertainty import DEFAULT_QUANTILES, validate_quantiles
+    if data.get("quantiles") is not None:
+        return validate_quantiles(data["quantiles"])
+    if data.get("intervals"):
+        return DEFAULT_QUANTILES
+    return None
+
+
 def predict_new_workflow(data):
     """Handle new workflow: multiple appliances, historical range, and prediction"""
-    import datetime
-    
     appliances = data["appliances"]  # List of appliance names
     range_type = data["range"]  # "month" or "year"
     prediction_year = int(data["predictionYear"])
     prediction_month = int(data["predictionMonth"])
     
+    # Load the data layer first, so its timed phases account for the numpy/pandas imports below
+    rt = runtime()
+    import numpy as np
+    from fallback import ALL_HOUSES
+    from features import build_feature_grid, select_model_features
+    from uncertainty import predict_with_intervals, supports_intervals
+    # Validated here so every route that dispatches to this workflow (incl. legacy /predict) gets a 400
+    try:
+        quantiles = requested_quantiles(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    history_store = rt.history_store
+    
     # Get current date for historical range calculation
     # Use the latest date in dataset instead of current date
-    latest_date = df["timestamp"].max()
+    latest_date = rt.df["timestamp"].max()
     
     # Calculate historical date range
     if range_type == "month":
@@ -249,144 +311,107 @@ def predict_new_workflow(data):
         # Past year: last 12 months from latest date
         start_date = latest_date - timedelta(days=365)
     
-    # Filter historical data (ensure we have data)
-    historical_df = df[df["timestamp"] >= start_date].copy()
+    # Historical usage for all selected appliances in one pass over the hourly totals
+    # (daily points for the past month, monthly points for the past year)
+    selected = [name for name in appliances if name in APPLIANCE_MAP]
+    lo, hi = history_store.slice(start_date, None)
+    if hi == lo:
+        # If no data in range, use all available data
+        lo, hi = history_store.slice(None, None)
+    resolution = "day" if range_type == "month" else "month"
+    historical_bins, historical_values = history_store.aggregate(
+        lo, hi, resolution, [history_store.appliance_index[name] for name in selected]
+    )
+    historical_totals = historical_values.sum(axis=0)
+    
+    # Prediction inputs shared by every appliance: all 24 hours of the mid-month day (15th)
+    prediction_date = date(prediction_year, prediction_month, 15)
+    days_in_month = calendar.monthrange(prediction_year, prediction_month)[1]
+    season = get_season(prediction_month)
     
-    # If no data in range, use all available data
-    if len(historical_df) == 0:
-        historical_df = df.copy()
+    # One model version for the whole request, even if a hot-swap happens meanwhile
+    model_set = rt.model_registry.current
+    encoder_lookup = model_set.encoder_lookup
+    
+    # Customer to predict for (default: most common house). Personalized models are
+    # picked per house; the pooled model sees the house as a feature.
+    house_id = str(data.get("houseId") or rt.default_house_id)
+    house_router = model_set.house_router
+    
+    ml_features = None
+    if encoder_lookup:
+        # Houses the pooled model never saw are predicted as the most common house;
+        # other unknown categories map to the encoder's fallback code
+        house_encoder = encoder_lookup['house']
+        pooled_house = house_id if house_id in house_encoder else rt.default_house_id
+        ml_features = build_feature_grid(
+            [prediction_date],
+            house_encoder.encode(pooled_house),
+            encoder_lookup['season'].encode(season),
+            encoder_lookup['festival'].encode("No_Festival")
+        )
+    
+    fallback = rt.fallback_predictor("month" if range_type == "month" else "year", start_date)
+    fallback_features = build_feature_grid(
+        [prediction_date], ALL_HOUSES, fallback.encoders['season'].encode(season), 0
+    )
     
     # Process each selected appliance
-    historical_data = {}
     predicted_data = {}
     appliance_totals = {}
     
-    for appliance_name in appliances:
-        if appliance_name not in APPLIANCE_MAP:
-            continue
-            
-        col = APPLIANCE_MAP[appliance_name]
-        
-        # Historical usage aggregation
-        if range_type == "month":
-            # Group by day for past month
-            historical_grouped = historical_df.groupby(historical_df["timestamp"].dt.date)[col].sum()
-            historical_data[appliance_name] = {
-                "dates": [str(d) for d in historical_grouped.index],
-                "values": historical_grouped.values.tolist()
-            }
-        else:  # year
-            # Group by month for past year
-            historical_grouped = historical_df.groupby([
-                historical_df["timestamp"].dt.year,
-                historical_df["timestamp"].dt.month
-            ])[col].sum()
-            historical_data[appliance_name] = {
-                "periods": [f"{y}-{m:02d}" for y, m in historical_grouped.index],
-                "values": historical_grouped.values.tolist()
-            }
-        
+    for i, appliance_name in enumerate(selected):
         # Calculate total historical usage
-        appliance_totals[appliance_name] = float(historical_df[col].sum())
+        appliance_totals[appliance_name] = float(historical_totals[i])
+        
+        # Use the house's personalized model, else the pooled ML model, else the statistical method
+        model, source = None, "statistical"
+        if ml_features is not None:
+            if house_router is not None:
+                model, source = house_router.model_for(house_id, appliance_name)
+            if model is None:
+                # Lazy load model if not already loaded
+                model, source = model_set.load_model(appliance_name), "pooled"
         
-        # Use ML model for prediction if available, otherwise use statistical method
-        # Lazy load model if not already loaded
-        model = load_model(appliance_name)
-        if model and encoders:
+        avg_hourly = None
+        bands = None
+        if model is not None:
             try:
-                # Prepare prediction input
-                # Use most common house_id, or first one
-                house_id = df["house_id"].mode()[0] if len(df["house_id"].mode()) > 0 else df["house_id"].iloc[0]
-                season = get_season(prediction_month)
-                festival = "No_Festival"
-                
-                # Encode inputs
-                house_encoded = encoders['house'].transform([house_id])[0]
-                season_encoded = encoders['season'].transform([season])[0]
-                festival_encoded = encoders['festival'].transform([festival])[0]
-                
-                # Calculate DayOfWeek (using 15th as mid-month day)
-                # Create a date object to get day of week
-                test_date = date(prediction_year, prediction_month, 15)
-                day_of_week = test_date.weekday()  # 0=Monday, 6=Sunday
-                is_weekend = 1 if day_of_week >= 5 else 0
-                
-                # Cyclic encoding for hour and month
-                hour_sin = np.sin(2 * np.pi * np.arange(24) / 24)
-                hour_cos = np.cos(2 * np.pi * np.arange(24) / 24)
-                month_sin = np.sin(2 * np.pi * prediction_month / 12)
-                month_cos = np.cos(2 * np.pi * prediction_month / 12)
-                
-                # Create feature array (average hour for month)
-                # Predict for each hour and average
-                hourly_predictions = []
-                for hour in range(24):
-                    # Build feature array matching training features:
-                    # ['house_id_encoded', 'season_encoded', 'festival_encoded',
-                    #  'Hour', 'Day', 'Month', 'Year',
-                    #  'DayOfWeek', 'IsWeekend',
-                    #  'Hour_sin', 'Hour_cos', 'Month_sin', 'Month_cos']
-                    features = np.array([[
-                        house_encoded, season_encoded, festival_encoded,
-                        hour, 15, prediction_month, prediction_year,
-                        day_of_week, is_weekend,
-                        hour_sin[hour], hour_cos[hour], month_sin, month_cos
-                    ]])
-                    pred = model.predict(features)[0]
-                    hourly_predictions.append(pred)
-                
-                avg_hourly = np.mean(hourly_predictions)
-                
-                # Calculate days in month
-                if prediction_month == 12:
-                    next_month = datetime.date(prediction_year + 1, 1, 1)
+                model_features = select_model_features(model, ml_features)
+                if quantiles is not None and supports_intervals(model):
+                    # One per-tree pass gives the average and its band across trees
+                    avg_hourly, bands = predict_with_intervals(
+                        model, model_features, quantiles, pooled=True
+                    )
                 else:
-                    next_month = datetime.date(prediction_year, prediction_month + 1, 1)
-                current_month = datetime.date(prediction_year, prediction_month, 1)
-                days_in_month = (next_month - current_month).days
-                
-                predicted_monthly = float(avg_hourly * 24 * days_in_month)
-                
+                    hourly_predictions = model.predict(model_features)
+                    avg_hourly = np.mean(hourly_predictions)
             except Exception as e:
                 print(f"Error using ML model for {appliance_name}: {e}")
-                # Fallback to statistical method
-                prediction_season = get_season(prediction_month)
-                if prediction_season == "spring":
-                    prediction_season = "autumn"
-                season_avg = historical_df[historical_df["season"] == prediction_season][col].mean()
-                if pd.isna(season_avg):
-                    season_avg = historical_df[col].mean()
-                
-                if prediction_month == 12:
-                    next_month = datetime.date(prediction_year + 1, 1, 1)
-                else:
-                    next_month = datetime.date(prediction_year, prediction_month + 1, 1)
-                current_month = datetime.date(prediction_year, prediction_month, 1)
-                days_in_month = (next_month - current_month).days
-                
-                predicted_monthly = float(season_avg * 24 * days_in_month)
-        else:
-            # Statistical prediction fallback
-            prediction_season = get_season(prediction_month)
-            if prediction_season == "spring":
-                prediction_season = "autumn"
-            season_avg = historical_df[historical_df["season"] == prediction_season][col].mean()
-            if pd.isna(season_avg):
-                season_avg = historical_df[col].mean()
-            
-            if prediction_month == 12:
-                next_month = datetime.date(prediction_year + 1, 1, 1)
-            else:
-                next_month = datetime.date(prediction_year, prediction_month + 1, 1)
-            current_month = datetime.date(prediction_year, prediction_month, 1)
-            days_in_month = (next_month - current_month).days
-            
-            predicted_monthly = float(season_avg * 24 * days_in_month)
+        
+        if avg_hourly is None:
+            # Statistical prediction fallback (precomputed lookup tables)
+            source = "statistical"
+            bands = None
+            avg_hourly = np.mean(fallback.model(appliance_name).predict(fallback_features))
+        
+        predicted_monthly = float(avg_hourly * 24 * days_in_month)
         
         predicted_data[appliance_name] = {
             "predicted": predicted_monthly,
-            "unit": "kWh"
+            "unit": "kWh",
+            "model": source
         }
+        if quantiles is not None:
+            # Statistical predictions have no trees to spread over, so no band
+            monthly_bands = None if bands is None else [float(b * 24 * days_in_month) for b in bands]
+            predicted_data[appliance_name].update({
+                "lower": monthly_bands[0] if monthly_bands else None,
+                "upper": monthly_bands[-1] if monthly_bands else None,
+                "quantiles": (
+                    {f"{q:g}": v for q, v in zip(quantiles, monthly_bands)} if monthly_bands else None
+                ),
+            })
     
     # Calculate overall alert based on predicted usage
     total_predicted = sum([predicted_data[app]["predicted"] for app in predicted_data])
@@ -400,26 +425,46 @@ def predict_new_workflow(data):
         alert = "✅ Usage Normal"
     
     # Include model accuracies in response
-    models_on_disk = count_models_on_disk()
     response_data = {
-        "historical": historical_data,
         "predicted": predicted_data,
         "totals": appliance_totals,
         "range": range_type,
         "predictionPeriod": f"{prediction_year}-{prediction_month:02d}",
         "alert": alert,
         "modelInfo": {
-            "modelsAvailable": len(model_paths),
-            "modelsOnDisk": models_on_disk,
-            "modelsLoaded": len(models),
-            "accuracies": model_accuracies,
+            "modelVersion": model_set.version,
+            "modelsAvailable": len(model_set.model_paths),
+            "modelsOnDisk": model_set.count_models_on_disk(),
+            "modelsLoaded": len(model_set.models),
+            "accuracies": model_set.accuracies,
             # ML can be available even if models aren't loaded yet (lazy loading).
-            "usingML": bool(models_on_disk > 0 and (encoders or has_encoders_on_disk())),
-            "lazyLoading": True
+            "usingML": model_set.using_ml(),
+            "lazyLoading": True,
+            "houseId": house_id,
+            "personalization": house_router.summary() if house_router is not None else None
         }
     }
     
-    return jsonify(response_data)
+    def build_json():
+        # Historical usage aggregation
+        # (daily "dates" for the past month, monthly "periods" for the past year)
+        if range_type == "month":
+            label_key, labels = "dates", historical_bins.strftime("%Y-%m-%d")
+        else:
+            label_key, labels = "periods", historical_bins.strftime("%Y-%m")
+        labels = [str(label) for label in labels]
+        historical_data = {
+            name: {label_key: labels, "values": historical_values[:, i].tolist()}
+            for i, name in enumerate(selected)
+        }
+        return {"historical": historical_data, **response_data}
+    
+    payload = ColumnarPayload(
+        historical_bins,
+        {name: historical_values[:, i] for i, name in enumerate(selected)},
+        meta=response_data
+    )
+    return chart_response(request, payload, build_json)
 
 
 def get_season(month):
@@ -434,21 +479,46 @@ def get_season(month):
         return "autumn"
 
 
+@app.route("/alerts", methods=["GET"])
+def alerts():
+    """Active usage alerts across all houses × appliances (optional filters: house, appliance, severity, type)"""
+    alert_engine = runtime().alert_engine
+    active = alert_engine.active
+    filters = {
+        "house_id": request.args.get("house"),
+        "appliance": request.args.get("appliance"),
+        "severity": request.args.get("severity"),
+        "type": request.args.get("type"),
+    }
+    for key, value in filters.items():
+        if value:
+            active = [alert for alert in active if alert[key] == value]
+    return jsonify({
+        "alerts": active,
+        "summary": alert_engine.summary()
+    })
+
+
 @app.route("/backend_info", methods=["GET"])
 def backend_info():
     """Return backend information including model accuracies"""
-    models_on_disk = count_models_on_disk()
+    model_set = runtime().model_registry.current
     return jsonify({
         "modelType": "RandomForestRegressor",
-        "modelsAvailable": len(model_paths),
-        "modelsOnDisk": models_on_disk,
-        "modelsLoaded": len(models),
-        "accuracies": model_accuracies,
+        "modelVersion": model_set.version,
+        "modelsAvailable": len(model_set.model_paths),
+        "modelsOnDisk": model_set.count_models_on_disk(),
+        "modelsLoaded": len(model_set.models),
+        "accuracies": model_set.accuracies,
         "lazyLoading": True,
         # "usingML" previously depended on models being loaded at runtime (len(models) > 0),
         # which is misleading with lazy loading. We consider ML "available" if models exist on disk
         # and encoders are present; they may still be not-yet-loaded until the first prediction.
-        "usingML": bool(models_on_disk > 0 and (encoders or has_encoders_on_disk())),
+        "usingML": model_set.using_ml(),
+        # Per-house models from train_house_models.py (None if this version has none)
+        "personalization": (
+            model_set.house_router.summary() if model_set.house_router is not None else None
+        ),
         "port": 5001
     })
 
@@ -457,13 +527,14 @@ if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("Starting Flask Backend Server...")
     print("=" * 60)
-    print(f"Dataset loaded: {len(df):,} rows")
-    print(f"Models available: {len(model_paths)} (lazy loading enabled)")
-    print(f"Models pre-loaded: {len(models)}")
+    # With debug=True the reloader parent only watches files; warm the data layer in the serving child
+    create_app(BACKGROUND_LOAD and os.environ.get("WERKZEUG_RUN_MAIN") == "true")
+    startup_timer.print_report("Startup timing (data layer still warming in background)"
+                               if BACKGROUND_LOAD else "Startup timing (data layer loads on first request)")
+    print(f"Models available: {len(APPLIANCE_NAMES)} (lazy loading enabled)")
+    print("New model versions are hot-swapped; GET /health reports load status and phase timings")
     print("=" * 60)
     print("\nServer starting on http://localhost:5001")
     print("Models will be loaded on-demand for faster startup")
     print("Press CTRL+C to stop\n")
     app.run(debug=True, host='0.0.0.0', port=5001)
-
-
@@ -0,0 +1,33 @@
+"""
+Appliance names, dataset columns and model file naming
+Plain Python (no numpy/pandas) so it can be imported at app startup for free
+"""
+
+# Appliance display name -> dataset target column (20 appliances)
+APPLIANCE_COLUMNS = {
+    "AC": "ac",
+    "Fridge": "fridge",
+    "Lights": "lights",
+    "Fan": "fans",
+    "Washing Machine": "washing_machine",
+    "TV": "tv",
+    "Microwave": "microwave",
+    "Oven": "oven",
+    "Dishwasher": "dishwasher",
+    "Water Heater": "water_heater",
+    "Dryer": "dryer",
+    "Computer": "computer",
+    "Motor": "motor",
+    "Sound System": "sound_system",
+    "Electric Stove": "stove",
+    "Refrigerator": "refrigerator",
+    "Freezer": "freezer",
+    "Air Purifier": "air_purifier",
+    "Humidifier": "humidifier",
+    "Dehumidifier": "dehumidifier"
+}
+
+
+def model_filename(appliance_name, suffix="_model.pkl"):
+    """File name of an appliance model, e.g. 'Washing Machine' -> 'washing_machine_model.pkl'."""
+    return f"{appliance_name.lower().replace(' ', '_')}{suffix}"
@@ -0,0 +1,106 @@
+"""
+Compress trained appliance models for low-memory serving
+Prunes each forest to the fewest trees within an R² tolerance and stores
+thresholds/leaf values at reduced precision (see compression.py)
+
+Usage:
+  python backend/compress_models.py                 # default tolerance 0.005
+  python backend/compress_models.py 0.01            # allow up to 1% R² loss
+  python backend/compress_models.py 0.01 float32    # keep float32 leaf values
+
+Serve the compact models with: USE_COMPACT_MODELS=1 python backend/app.py
+"""
+import os
+import sys
+import json
+import pickle
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings('ignore')
+
+from appliances import APPLIANCE_COLUMNS, model_filename
+from features import FEATURE_COLUMNS, add_time_features
+from label_lookup import compile_encoders
+from compression import COMPACT_MODEL_SUFFIX, DEFAULT_R2_TOLERANCE, REPORT_FILE, compress_forest
+from evaluation import time_ordered_split
+from registry import VersionWriter, resolve_current
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "model", "appliance_usage_dataset.csv")
+MODEL_DIR = os.path.join(BASE_DIR, "model", "trained_models")
+
+tolerance = DEFAULT_R2_TOLERANCE
+value_dtype = np.float16
+try:
+    if len(sys.argv) > 1:
+        tolerance = float(sys.argv[1])
+    if len(sys.argv) > 2:
+        value_dtype = np.dtype(sys.argv[2]).type
+except (ValueError, TypeError):
+    print("Usage: python backend/compress_models.py [r2_tolerance] [float16|float32]")
+    sys.exit(1)
+
+# Compress the live model version into a new version (published atomically at the end)
+current_version, current_dir = resolve_current(MODEL_DIR)
+encoders_path = os.path.join(current_dir, "encoders.pkl")
+if not os.path.exists(encoders_path):
+    print("Error: encoders.pkl not found, run train_models.py first")
+    sys.exit(1)
+with open(encoders_path, 'rb') as f:
+    encoder_lookup = compile_encoders(pickle.load(f))
+
+# Rebuild the training features and hold out the same rows train_models.py tested on
+print("Loading data...")
+data = pd.read_csv(DATA_PATH)
+data['timestamp'] = pd.to_datetime(data['timestamp'], dayfirst=True)
+data['festival'] = data['festival'].fillna('No_Festival')
+add_time_features(data)
+data['house_id_encoded'] = encoder_lookup['house'].encode_many(data['house_id'])
+data['season_encoded'] = encoder_lookup['season'].encode_many(data['season'])
+data['festival_encoded'] = encoder_lookup['festival'].encode_many(data['festival'])
+X = data[FEATURE_COLUMNS]
+_, test_idx = time_ordered_split(data['timestamp'].to_numpy(), test_size=0.2)
+
+report = {}
+writer = VersionWriter(MODEL_DIR, source=f"compress_models.py from {current_version or 'unversioned'}")
+print(f"\nCompressing models (R² tolerance {tolerance}, leaf values {np.dtype(value_dtype).name})...")
+print("=" * 60)
+
+for appliance_name, appliance_col in APPLIANCE_COLUMNS.items():
+    model_path = os.path.join(current_dir, model_filename(appliance_name))
+    if not os.path.exists(model_path):
+        continue
+    with open(model_path, 'rb') as f:
+        forest = pickle.load(f)
+    if not hasattr(forest, 'estimators_'):
+        print(f"  - {appliance_name}: not a forest, skipping")
+        continue
+
+    X_test, y_test = X.iloc[test_idx], data[appliance_col].iloc[test_idx]
+    if hasattr(forest, 'feature_names_in_'):
+        X_test = X_test[list(forest.feature_names_in_)]
+
+    compact, stats = compress_forest(forest, X_test, y_test, tolerance, value_dtype)
+    compact_path = writer.path(model_filename(appliance_name, COMPACT_MODEL_SUFFIX))
+    with open(compact_path, 'wb') as f:
+        pickle.dump(compact, f)
+    report[appliance_name] = stats
+
+    print(f"  ✓ {appliance_name}: {stats['trees_before']} → {stats['trees_after']} trees, "
+          f"{stats['bytes_before'] / 1e6:.1f} MB → {stats['bytes_after'] / 1e6:.1f} MB, "
+          f"R² {stats['r2_before']:.4f} → {stats['r2_after']:.4f}, "
+          f"predict {stats['latency_ms_before']:.0f} ms → {stats['latency_ms_after']:.0f} ms")
+
+print("\n" + "=" * 60)
+if report:
+    with open(writer.path(REPORT_FILE), 'w') as f:
+        json.dump(report, f, indent=2)
+    version = writer.publish()
+    before = sum(r['bytes_before'] for r in report.values())
+    after = sum(r['bytes_after'] for r in report.values())
+    print(f"Compressed {len(report)} models: {before / 1e6:.1f} MB → {after / 1e6:.1f} MB")
+    print(f"Published model version {version} with {REPORT_FILE}")
+else:
+    writer.discard()
+    print("No trained models found to compress")
@@ -0,0 +1,178 @@
+"""
+Post-training compression for RandomForest appliance models
+Prunes each forest to the fewest trees within an R² tolerance and stores
+thresholds / leaf values at reduced precision for low-memory serving
+"""
+import pickle
+import time
+import numpy as np
+import pandas as pd
+
+# Default R² a pruned forest may give up against the full forest
+DEFAULT_R2_TOLERANCE = 0.005
+
+COMPACT_MODEL_SUFFIX = "_model.compact.pkl"
+# Per-appliance before/after stats written by compress_models.py
+REPORT_FILE = "compression_report.json"
+
+
+def _as_float32(X, feature_names=None):
+    """Feature matrix as contiguous float32 (what sklearn trees compare against)."""
+    if isinstance(X, pd.DataFrame):
+        if feature_names is not None:
+            X = X[list(feature_names)]
+        X = X.to_numpy()
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def _float32_thresholds(thresholds):
+    """
+    Round float64 split thresholds down to float32.
+    sklearn thresholds are midpoints between float32 values, so rounding toward
+    -inf keeps every split decision identical for float32 inputs.
+    """
+    t32 = thresholds.astype(np.float32)
+    too_high = t32.astype(np.float64) > thresholds
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+class CompactForest:
+    """
+    Flattened, reduced-precision copy of a fitted RandomForestRegressor.
+    All trees share one set of node arrays; prediction walks every
+    (sample, tree) pair down the trees together in vectorized steps.
+    """
+
+    model_type = 'CompactRandomForest'
+
+    def __init__(self, forest, n_trees=None, value_dtype=np.float16):
+        estimators = forest.estimators_[:n_trees]
+        self.n_estimators = len(estimators)
+        self.value_dtype = np.dtype(value_dtype)
+        if hasattr(forest, 'feature_names_in_'):
+            self.feature_names_in_ = forest.feature_names_in_
+        self.n_features_in_ = forest.n_features_in_
+
+        lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+        offset = 0
+        self.max_depth = 0
+        for est in estimators:
+            tree = est.tree_
+            leaf = tree.children_left == -1
+            # Leaves point at themselves so finished walks stay put
+            node_ids = np.arange(tree.node_count)
+            lefts.append(np.where(leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(leaf, node_ids, tree.children_right) + offset)
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+            offset += tree.node_count
+            self.max_depth = max(self.max_depth, tree.max_depth)
+
+        index_dtype = np.int32 if offset < np.iinfo(np.int32).max else np.int64
+        self.children_left = np.concatenate(lefts).astype(index_dtype)
+        self.children_right = np.concatenate(rights).astype(index_dtype)
+        self.feature = np.concatenate(features).astype(np.int16)
+        self.threshold = _float32_thresholds(np.concatenate(thresholds))
+        self.value = np.concatenate(values).astype(self.value_dtype)
+        self.roots = np.asarray(roots, dtype=index_dtype)
+
+    @property
+    def node_count(self):
+        return len(self.value)
+
+    def apply(self, X):
+        """Leaf node index (into the shared arrays) per sample and tree: (n_samples, n_trees)."""
+        X = _as_float32(X, getattr(self, 'feature_names_in_', None))
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_estimators)).copy()
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.children_left[node], self.children_right[node])
+        return node
+
+    def predict_trees(self, X):
+        """Per-tree predictions: (n_trees, n_samples)."""
+        return self.value[self.apply(X)].astype(np.float64).T
+
+    def predict(self, X):
+        return self.predict_trees(X).mean(axis=0)
+
+
+def forest_tree_predictions(forest, X):
+    """
+    Per-tree predictions of a fitted sklearn forest, (n_trees, n_samples).
+    Uses forest.apply (one parallel pass) plus a leaf-value gather instead of
+    calling estimator.predict once per tree.
+    """
+    if isinstance(forest, CompactForest):
+        return forest.predict_trees(X)
+    leaves = forest.apply(X)  # (n_samples, n_trees)
+    out = np.empty((leaves.shape[1], leaves.shape[0]), dtype=np.float64)
+    for t, est in enumerate(forest.estimators_):
+        out[t] = est.tree_.value[leaves[:, t], 0, 0]
+    return out
+
+
+def prefix_r2_scores(tree_predictions, y_true):
+    """R² of the forest truncated to its first k trees, for every k = 1..n_trees."""
+    n_trees = tree_predictions.shape[0]
+    prefix_means = np.cumsum(tree_predictions, axis=0) / np.arange(1, n_trees + 1)[:, None]
+    y_true = np.asarray(y_true, dtype=np.float64)
+    ss_res = ((prefix_means - y_true) ** 2).sum(axis=1)
+    ss_tot = ((y_true - y_true.mean()) ** 2).sum()
+    if ss_tot == 0:
+        return np.zeros(n_trees)
+    return 1 - ss_res / ss_tot
+
+
+def smallest_tree_count(tree_predictions, y_true, tolerance=DEFAULT_R2_TOLERANCE):
+    """Fewest leading trees whose R² is within `tolerance` of the full forest."""
+    scores = prefix_r2_scores(tree_predictions, y_true)
+    target = scores[-1] - tolerance
+    return int(np.argmax(scores >= target)) + 1, scores
+
+
+def _time_predict(model, X, repeats=3):
+    """Best-of-n wall time for one predict call, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict(X)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def compress_forest(forest, X_val, y_val, tolerance=DEFAULT_R2_TOLERANCE, value_dtype=np.float16):
+    """
+    Prune and quantize a fitted forest against a validation set.
+    Falls back to float32 leaf values if `value_dtype` costs more R² than the tolerance allows.
+    Returns (CompactForest, report dict).
+    """
+    from sklearn.metrics import r2_score  # deferred: only needed offline, keeps serving imports light
+
+    tree_predictions = forest_tree_predictions(forest, X_val)
+    n_trees, scores = smallest_tree_count(tree_predictions, y_val, tolerance)
+    full_r2 = float(scores[-1])
+
+    compact = CompactForest(forest, n_trees=n_trees, value_dtype=value_dtype)
+    compact_r2 = float(r2_score(y_val, compact.predict(X_val)))
+    if compact_r2 < full_r2 - tolerance and compact.value_dtype != np.float32:
+        compact = CompactForest(forest, n_trees=n_trees, value_dtype=np.float32)
+        compact_r2 = float(r2_score(y_val, compact.predict(X_val)))
+
+    report = {
+        'trees_before': len(forest.estimators_),
+        'trees_after': compact.n_estimators,
+        'value_dtype': compact.value_dtype.name,
+        'bytes_before': len(pickle.dumps(forest)),
+        'bytes_after': len(pickle.dumps(compact)),
+        'r2_before': full_r2,
+        'r2_after': compact_r2,
+        'latency_ms_before': _time_predict(forest, X_val),
+        'latency_ms_after': _time_predict(compact, X_val),
+        'validation_rows': int(len(y_val)),
+    }
+    return compact, report
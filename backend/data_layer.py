@@ -0,0 +1,72 @@
+"""
+Serving data layer: the dataset, stores derived from it and the model registry
+Built once per process by app.py (lazily or in a background thread); heavy
+imports happen here, each timed as a startup phase
+"""
+
+
+class DataLayer:
+    """Everything the request handlers need that is expensive to build."""
+
+    def __init__(self, data_path, model_dir, appliance_names, appliance_map, timer,
+                 prefer_compact=False, poll_seconds=None, house_shard_cache=None):
+        self.appliance_map = appliance_map
+
+        with timer.phase("import numpy/pandas"):
+            import pandas as pd
+
+        with timer.phase("read dataset"):
+            df = pd.read_csv(data_path)
+
+        with timer.phase("derive datetime columns"):
+            # Convert timestamp
+            df["timestamp"] = pd.to_datetime(df["timestamp"], dayfirst=True)
+            df["hour"] = df["timestamp"].dt.hour
+            df["day"] = df["timestamp"].dt.day
+            df["month"] = df["timestamp"].dt.month
+            df["year"] = df["timestamp"].dt.year
+            df["festival"] = df["festival"].fillna('No_Festival')
+        self.df = df
+
+        # Most common house, used as the default customer for predictions
+        house_mode = df["house_id"].mode()
+        self.default_house_id = house_mode[0] if len(house_mode) > 0 else df["house_id"].iloc[0]
+
+        with timer.phase("history store"):
+            from history import HistoryStore
+            # Hourly usage totals for historical range queries (aggregated once per data load)
+            self.history_store = HistoryStore(df, appliance_map)
+
+        with timer.phase("alert engine"):
+            from alerts import AlertEngine
+            # Rolling per-house, per-appliance usage statistics for fleet alerts
+            self.alert_engine = AlertEngine(appliance_map)
+            self.alert_engine.ingest(df)
+
+        with timer.phase("model registry (sklearn, encoders)"):
+            from personalization import DEFAULT_SHARD_CACHE
+            from registry import DEFAULT_POLL_SECONDS, ModelRegistry
+            # ML models and encoders from the live registry version (lazy load models).
+            # A background watcher preloads and hot-swaps new versions published by train_models.py.
+            self.model_registry = ModelRegistry(
+                model_dir, appliance_names,
+                prefer_compact=prefer_compact,
+                poll_seconds=DEFAULT_POLL_SECONDS if poll_seconds is None else poll_seconds,
+                house_shard_cache=DEFAULT_SHARD_CACHE if house_shard_cache is None else house_shard_cache
+            )
+            self.model_registry.start_watcher()
+
+        self.fallback_predictors = {}  # Statistical fallback tables per historical range
+
+    def fallback_predictor(self, range_type, start_date):
+        """Statistical lookup tables for a historical window, built once per data load."""
+        if range_type not in self.fallback_predictors:
+            from fallback import StatisticalPredictor
+            historical_df = self.df[self.df["timestamp"] >= start_date]
+            # If no data in range, use all available data
+            if len(historical_df) == 0:
+                historical_df = self.df
+            self.fallback_predictors[range_type] = StatisticalPredictor(
+                historical_df, self.appliance_map
+            )
+        return self.fallback_predictors[range_type]
@@ -0,0 +1,119 @@
+"""
+Honest model evaluation for train_models.py
+Time-ordered holdout plus rolling-origin backtests run in parallel over folds,
+with every metric computed from a single prediction pass
+"""
+import os
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+DEFAULT_BACKTEST_FOLDS = 3
+BACKTEST_FILE = "backtest.json"
+
+
+def regression_metrics(y_true, pred):
+    """R², MAE and RMSE from one set of predictions."""
+    return {
+        'r2': float(r2_score(y_true, pred)),
+        'mae': float(mean_absolute_error(y_true, pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_true, pred))),
+    }
+
+
+def _cut_points(timestamps, fractions):
+    """Timestamps at the given fractions of the sorted unique time axis."""
+    unique = np.unique(np.asarray(timestamps))
+    return [unique[min(int(len(unique) * f), len(unique) - 1)] for f in fractions]
+
+
+def time_ordered_split(timestamps, test_size=0.2):
+    """
+    Positional (train_idx, test_idx) with the latest `test_size` of the time axis held out.
+    Rows sharing a timestamp (different houses) always land on the same side.
+    """
+    timestamps = np.asarray(timestamps)
+    (cutoff,) = _cut_points(timestamps, [1 - test_size])
+    return np.flatnonzero(timestamps < cutoff), np.flatnonzero(timestamps >= cutoff)
+
+
+def rolling_origin_folds(timestamps, n_folds=DEFAULT_BACKTEST_FOLDS, min_train_fraction=0.5):
+    """
+    Expanding-window folds: train on everything before the origin, test on the next slice.
+    The last `1 - min_train_fraction` of the time axis is split into `n_folds` test slices.
+    Returns a list of positional (train_idx, test_idx).
+    """
+    timestamps = np.asarray(timestamps)
+    step = (1 - min_train_fraction) / n_folds
+    fractions = [min_train_fraction + i * step for i in range(n_folds)] + [1.0]
+    edges = _cut_points(timestamps, fractions)
+    edges[-1] = np.unique(timestamps)[-1]
+
+    folds = []
+    for i in range(n_folds):
+        start, end = edges[i], edges[i + 1]
+        test_mask = (timestamps >= start) & ((timestamps < end) | (i == n_folds - 1))
+        train_idx = np.flatnonzero(timestamps < start)
+        test_idx = np.flatnonzero(test_mask)
+        if len(train_idx) and len(test_idx):
+            folds.append((train_idx, test_idx))
+    return folds
+
+
+def _run_fold(fold_num, model, X, y, timestamps, train_idx, test_idx):
+    start = time.perf_counter()
+    model.fit(X.iloc[train_idx], y.iloc[train_idx])
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pred = model.predict(X.iloc[test_idx])
+    predict_seconds = time.perf_counter() - start
+
+    result = {
+        'fold': fold_num,
+        'train_end': str(timestamps[train_idx].max()),
+        'test_start': str(timestamps[test_idx].min()),
+        'test_end': str(timestamps[test_idx].max()),
+        'n_train': int(len(train_idx)),
+        'n_test': int(len(test_idx)),
+    }
+    result.update(regression_metrics(y.iloc[test_idx], pred))
+    result['fit_seconds'] = fit_seconds
+    result['predict_seconds'] = predict_seconds
+    return result
+
+
+def backtest(estimator, X, y, timestamps, n_folds=DEFAULT_BACKTEST_FOLDS, n_jobs=-1):
+    """
+    Rolling-origin backtest of `estimator` (cloned per fold), folds fitted in parallel.
+    Folds run in threads (tree fitting releases the GIL, no data copies) and each
+    fold's own n_jobs is shrunk so the machine is not oversubscribed.
+    Returns {'folds': [...per-fold metrics and timings...], 'mean': {...}}.
+    """
+    timestamps = np.asarray(timestamps)
+    folds = rolling_origin_folds(timestamps, n_folds)
+    if not folds:
+        return {'folds': [], 'mean': {}}
+
+    workers = os.cpu_count() or 1
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = workers
+    n_jobs = min(n_jobs, len(folds))
+
+    fold_models = []
+    for _ in folds:
+        model = clone(estimator)
+        if 'n_jobs' in model.get_params():
+            model.set_params(n_jobs=max(1, workers // n_jobs))
+        fold_models.append(model)
+
+    results = Parallel(n_jobs=n_jobs, prefer='threads')(
+        delayed(_run_fold)(i + 1, model, X, y, timestamps, train_idx, test_idx)
+        for i, (model, (train_idx, test_idx)) in enumerate(zip(fold_models, folds))
+    )
+
+    keys = ['r2', 'mae', 'rmse', 'fit_seconds', 'predict_seconds']
+    mean = {k: float(np.mean([r[k] for r in results])) for k in keys}
+    return {'folds': results, 'mean': mean}
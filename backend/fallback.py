@@ -0,0 +1,133 @@
+"""
+Statistical fallback predictor for the non-ML prediction path
+Precomputes per-(season, house, hour) usage tables once per data load and answers by lookup
+"""
+import numpy as np
+import pandas as pd
+
+from features import FEATURE_INDEX
+from label_lookup import CompiledEncoder, DEFAULT_FALLBACK_LABELS, UNKNOWN_CODE
+
+# House code meaning "all houses pooled"
+ALL_HOUSES = UNKNOWN_CODE
+
+
+def _column(X, name):
+    """Read one feature column from a DataFrame or a full feature block."""
+    if isinstance(X, pd.DataFrame):
+        return X[name].to_numpy()
+    return np.asarray(X)[:, FEATURE_INDEX[name]]
+
+
+class StatisticalPredictor:
+    """
+    Mean-usage lookup tables for every appliance, built from one slice of history.
+
+    Tables (last axis = appliance):
+      hourly_profile  (season, house, hour)  mean usage
+      pooled_profile  (season, hour)         all houses pooled
+      season_means    (season, house)        mean usage over all hours
+      pooled_season_means (season)           all houses pooled
+      hour_means      (hour)                 all seasons and houses
+      overall_means   ()                     whole slice
+    Missing cells fall back down that chain (season-aware tables first), so a lookup
+    always returns a number.
+    """
+
+    def __init__(self, data, appliance_map):
+        self.appliance_map = dict(appliance_map)
+        self.appliance_index = {name: i for i, name in enumerate(self.appliance_map)}
+        cols = list(self.appliance_map.values())
+
+        # Codes match LabelEncoder (sorted classes) so ML feature blocks can be reused
+        self.encoders = {
+            'house': CompiledEncoder(np.sort(data["house_id"].unique())),
+            'season': CompiledEncoder(
+                np.sort(data["season"].unique()), DEFAULT_FALLBACK_LABELS['season']
+            ),
+        }
+        n_seasons = len(self.encoders['season'].classes_)
+        n_houses = len(self.encoders['house'].classes_)
+        n_apps = len(cols)
+
+        season_code = self.encoders['season'].encode_many(data["season"])
+        house_code = self.encoders['house'].encode_many(data["house_id"])
+        hour = data["timestamp"].dt.hour.to_numpy()
+        values = data[cols].to_numpy(dtype=np.float64)
+
+        # Sums and non-missing counts per (season, house, hour) cell, one bincount per appliance
+        cell = (season_code * n_houses + house_code) * 24 + hour
+        n_cells = n_seasons * n_houses * 24
+        sums = np.empty((n_cells, n_apps))
+        counts = np.empty((n_cells, n_apps))
+        for i in range(n_apps):
+            present = ~np.isnan(values[:, i])
+            sums[:, i] = np.bincount(cell[present], weights=values[present, i], minlength=n_cells)
+            counts[:, i] = np.bincount(cell[present], minlength=n_cells)
+
+        sums = sums.reshape(n_seasons, n_houses, 24, n_apps)
+        counts = counts.reshape(n_seasons, n_houses, 24, n_apps)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.hourly_profile = sums / counts
+            self.pooled_profile = sums.sum(axis=1) / counts.sum(axis=1)
+            self.season_means = sums.sum(axis=2) / counts.sum(axis=2)
+            self.pooled_season_means = sums.sum(axis=(1, 2)) / counts.sum(axis=(1, 2))
+            self.hour_means = sums.sum(axis=(0, 1)) / counts.sum(axis=(0, 1))
+            self.overall_means = sums.sum(axis=(0, 1, 2)) / counts.sum(axis=(0, 1, 2))
+
+    def model(self, appliance_name):
+        """Per-appliance view with the same predict(X) interface as the ML models."""
+        return FallbackModel(self, self.appliance_index[appliance_name])
+
+    def lookup(self, app_idx, season_code, house_code, hour):
+        """Vectorized hourly lookup with the missing-cell fallback chain."""
+        season_code = np.asarray(season_code, dtype=int)
+        house_code = np.asarray(house_code, dtype=int)
+        hour = np.asarray(hour, dtype=int)
+
+        valid_season = season_code >= 0
+        valid_house = valid_season & (house_code >= 0)
+        s = np.where(valid_season, season_code, 0)
+        h = np.where(valid_house, house_code, 0)
+
+        result = np.where(valid_house, self.hourly_profile[s, h, hour, app_idx], np.nan)
+        pooled = np.where(valid_season, self.pooled_profile[s, hour, app_idx], np.nan)
+        result = np.where(np.isnan(result), pooled, result)
+        # Hours with no readings take the season's mean before any season-agnostic table
+        house_season = np.where(valid_house, self.season_means[s, h, app_idx], np.nan)
+        result = np.where(np.isnan(result), house_season, result)
+        season = np.where(valid_season, self.pooled_season_means[s, app_idx], np.nan)
+        result = np.where(np.isnan(result), season, result)
+        result = np.where(np.isnan(result), self.hour_means[hour, app_idx], result)
+        return np.where(np.isnan(result), self.overall_means[app_idx], result)
+
+    def season_mean(self, appliance_name, season, house_id=None):
+        """Mean hourly usage for a season (all houses pooled unless house_id given)."""
+        app_idx = self.appliance_index[appliance_name]
+        s = self.encoders['season'].encode(season)
+        h = ALL_HOUSES if house_id is None else self.encoders['house'].encode(house_id)
+        if s != UNKNOWN_CODE:
+            if h != ALL_HOUSES and not np.isnan(self.season_means[s, h, app_idx]):
+                return float(self.season_means[s, h, app_idx])
+            if not np.isnan(self.pooled_season_means[s, app_idx]):
+                return float(self.pooled_season_means[s, app_idx])
+        return float(self.overall_means[app_idx])
+
+
+class FallbackModel:
+    """Single-appliance statistical model: predict(X) over a feature block."""
+
+    model_type = 'Statistical'
+
+    def __init__(self, predictor, app_idx):
+        self.predictor = predictor
+        self.app_idx = app_idx
+
+    def predict(self, X):
+        return self.predictor.lookup(
+            self.app_idx,
+            _column(X, 'season_encoded'),
+            _column(X, 'house_id_encoded'),
+            _column(X, 'Hour'),
+        )
@@ -0,0 +1,154 @@
+"""
+Shared feature engineering for training (train_models.py) and serving (app.py)
+Keeps the 13-column feature layout in one place so both sides cannot drift apart
+"""
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+# Feature layout used by every appliance model (order matters)
+FEATURE_COLUMNS = [
+    'house_id_encoded', 'season_encoded', 'festival_encoded',
+    'Hour', 'Day', 'Month', 'Year',
+    'DayOfWeek', 'IsWeekend',
+    'Hour_sin', 'Hour_cos', 'Month_sin', 'Month_cos'
+]
+FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_COLUMNS)}
+FEATURE_COLUMNS_FILE = "feature_columns.pkl"
+
+HOURS = np.arange(24)
+
+# Cyclic encoding lookup tables: hour 23 is close to hour 0, December close to January.
+# Indexed directly by hour (0-23) and month (1-12; slot 0 unused).
+HOUR_SIN = np.sin(2 * np.pi * HOURS / 24)
+HOUR_COS = np.cos(2 * np.pi * HOURS / 24)
+MONTH_SIN = np.sin(2 * np.pi * np.arange(13) / 12)
+MONTH_COS = np.cos(2 * np.pi * np.arange(13) / 12)
+
+
+def add_time_features(data, timestamp_col='timestamp'):
+    """
+    Add the calendar and cyclic feature columns derived from the timestamp.
+    `data[timestamp_col]` must already be a datetime column. Modifies `data` in place and returns it.
+    """
+    ts = data[timestamp_col].dt
+    data['Hour'] = ts.hour
+    data['Day'] = ts.day
+    data['Month'] = ts.month
+    data['Year'] = ts.year
+    data['DayOfWeek'] = ts.dayofweek  # 0=Monday, 6=Sunday
+    data['IsWeekend'] = (data['DayOfWeek'] >= 5).astype(int)
+
+    hour = data['Hour'].to_numpy()
+    month = data['Month'].to_numpy()
+    data['Hour_sin'] = HOUR_SIN[hour]
+    data['Hour_cos'] = HOUR_COS[hour]
+    data['Month_sin'] = MONTH_SIN[month]
+    data['Month_cos'] = MONTH_COS[month]
+    return data
+
+
+def save_feature_columns(model_dir, columns=None):
+    """Write the feature layout next to the trained models."""
+    path = os.path.join(model_dir, FEATURE_COLUMNS_FILE)
+    with open(path, 'wb') as f:
+        pickle.dump(list(columns if columns is not None else FEATURE_COLUMNS), f)
+    return path
+
+
+def load_feature_columns(model_dir):
+    """Read the saved feature layout, or None if training never wrote one."""
+    path = os.path.join(model_dir, FEATURE_COLUMNS_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return list(pickle.load(f))
+
+
+def validate_feature_columns(columns):
+    """
+    Check a saved feature layout against FEATURE_COLUMNS.
+    Raises ValueError describing the first mismatch (train/serve skew).
+    """
+    columns = list(columns)
+    if columns == FEATURE_COLUMNS:
+        return
+    if len(columns) != len(FEATURE_COLUMNS):
+        raise ValueError(
+            f"Saved feature layout has {len(columns)} columns, expected {len(FEATURE_COLUMNS)}"
+        )
+    for i, (saved, expected) in enumerate(zip(columns, FEATURE_COLUMNS)):
+        if saved != expected:
+            raise ValueError(
+                f"Saved feature column {i} is '{saved}', expected '{expected}'"
+            )
+
+
+def model_feature_columns(model):
+    """
+    Columns the model was fitted on. Training drops zero-variance columns,
+    so this can be a subset of FEATURE_COLUMNS.
+    """
+    names = getattr(model, 'feature_names_in_', None)
+    if names is None:
+        return FEATURE_COLUMNS
+    return [str(name) for name in names]
+
+
+def select_model_features(model, block):
+    """
+    Slice a full 13-column feature block down to the columns `model` expects,
+    returned as a DataFrame so sklearn sees matching feature names.
+    """
+    columns = model_feature_columns(model)
+    if columns == FEATURE_COLUMNS:
+        return pd.DataFrame(block, columns=FEATURE_COLUMNS)
+    missing = [c for c in columns if c not in FEATURE_INDEX]
+    if missing:
+        raise ValueError(f"Model expects unknown feature columns: {missing}")
+    idx = [FEATURE_INDEX[c] for c in columns]
+    return pd.DataFrame(block[:, idx], columns=columns)
+
+
+def build_feature_grid(dates, house_code, season_code, festival_code, hours=HOURS):
+    """
+    Build the feature block for every (date, hour) pair of a date grid in one pass.
+
+    `dates` is anything pd.DatetimeIndex accepts. The codes are either scalars or
+    arrays with one entry per date (e.g. season changing across a multi-month grid).
+    Rows are ordered date-major: all hours of dates[0], then dates[1], ...
+    Returns a float64 array of shape (len(dates) * len(hours), len(FEATURE_COLUMNS)).
+    """
+    idx = pd.DatetimeIndex(dates)
+    hours = np.asarray(hours, dtype=int)
+    n_days = len(idx)
+    n_hours = len(hours)
+
+    block = np.empty((n_days * n_hours, len(FEATURE_COLUMNS)), dtype=np.float64)
+
+    def per_day(values):
+        # Broadcast a scalar or per-date array to one value per row
+        values = np.asarray(values)
+        if values.ndim == 0:
+            return values
+        return np.repeat(values, n_hours)
+
+    month = idx.month.to_numpy()
+    day_of_week = idx.dayofweek.to_numpy()
+    row_hours = np.tile(hours, n_days)
+
+    block[:, FEATURE_INDEX['house_id_encoded']] = per_day(house_code)
+    block[:, FEATURE_INDEX['season_encoded']] = per_day(season_code)
+    block[:, FEATURE_INDEX['festival_encoded']] = per_day(festival_code)
+    block[:, FEATURE_INDEX['Hour']] = row_hours
+    block[:, FEATURE_INDEX['Day']] = per_day(idx.day.to_numpy())
+    block[:, FEATURE_INDEX['Month']] = per_day(month)
+    block[:, FEATURE_INDEX['Year']] = per_day(idx.year.to_numpy())
+    block[:, FEATURE_INDEX['DayOfWeek']] = per_day(day_of_week)
+    block[:, FEATURE_INDEX['IsWeekend']] = per_day((day_of_week >= 5).astype(int))
+    block[:, FEATURE_INDEX['Hour_sin']] = HOUR_SIN[row_hours]
+    block[:, FEATURE_INDEX['Hour_cos']] = HOUR_COS[row_hours]
+    block[:, FEATURE_INDEX['Month_sin']] = per_day(MONTH_SIN[month])
+    block[:, FEATURE_INDEX['Month_cos']] = per_day(MONTH_COS[month])
+    return block
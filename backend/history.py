@@ -0,0 +1,167 @@
+"""
+Historical usage queries over any date span
+Hourly totals are aggregated once per data load; queries slice them, bin to a
+resolution and downsample so every response stays under a point budget
+"""
+import numpy as np
+import pandas as pd
+
+# Resolution name -> pandas period frequency, finest first
+RESOLUTIONS = {
+    'hour': 'h',
+    'day': 'D',
+    'week': 'W',
+    'month': 'M',
+    'year': 'Y',
+}
+
+# Approximate bin width in hours, used to pick a resolution before binning
+RESOLUTION_HOURS = {
+    'hour': 1,
+    'day': 24,
+    'week': 24 * 7,
+    'month': 24 * 30.44,
+    'year': 24 * 365.25,
+}
+
+DOWNSAMPLE_METHODS = ('mean', 'minmax')
+DEFAULT_MAX_POINTS = 500
+MAX_POINTS_LIMIT = 5000
+
+
+def _parse_bound(value, name):
+    """
+    Client-supplied start/end as a naive Timestamp comparable with the (naive) index.
+    A timezone offset is dropped, keeping the wall-clock time as written.
+    Raises ValueError for anything that is not a date/time.
+    """
+    try:
+        ts = pd.Timestamp(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a date/time, got {value!r}")
+    if pd.isna(ts):
+        raise ValueError(f"{name} must be a date/time, got {value!r}")
+    if ts.tzinfo is not None:
+        ts = ts.tz_localize(None)
+    return ts
+
+
+class HistoryStore:
+    """
+    Hourly usage totals (summed over houses) for every appliance, on one sorted time axis.
+    """
+
+    def __init__(self, data, appliance_map):
+        self.appliance_map = dict(appliance_map)
+        self.appliance_index = {name: i for i, name in enumerate(self.appliance_map)}
+        hourly = data.groupby("timestamp")[list(self.appliance_map.values())].sum().sort_index()
+        self.index = hourly.index
+        self.values = hourly.to_numpy(dtype=np.float64)
+
+    @property
+    def earliest(self):
+        return self.index[0]
+
+    @property
+    def latest(self):
+        return self.index[-1]
+
+    def slice(self, start=None, end=None):
+        """Positional [lo, hi) bounds of rows with start <= timestamp <= end."""
+        lo = 0 if start is None else self.index.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(self.index) if end is None else self.index.searchsorted(pd.Timestamp(end), side='right')
+        return lo, hi
+
+    def choose_resolution(self, start, end, max_points=DEFAULT_MAX_POINTS):
+        """Finest resolution whose bin count over [start, end] fits in max_points."""
+        span_hours = max((pd.Timestamp(end) - pd.Timestamp(start)) / pd.Timedelta(hours=1), 1)
+        for name, hours in RESOLUTION_HOURS.items():
+            if span_hours / hours + 1 <= max_points:
+                return name
+        return 'year'
+
+    def aggregate(self, lo, hi, resolution, columns):
+        """
+        Sum the hourly rows [lo, hi) into resolution bins.
+        Rows are sorted, so each bin is a contiguous run and np.add.reduceat does the work.
+        Returns (bin start timestamps, values of shape (n_bins, len(columns))).
+        """
+        idx = self.index[lo:hi]
+        values = self.values[lo:hi][:, columns]
+        if len(idx) == 0:
+            return idx, values
+        if resolution == 'hour':
+            return idx, values
+        periods = idx.to_period(RESOLUTIONS[resolution])
+        codes = periods.asi8
+        starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+        bins = periods[starts].start_time
+        return bins, np.add.reduceat(values, starts, axis=0)
+
+    def query(self, appliances, start=None, end=None, resolution='auto',
+              max_points=DEFAULT_MAX_POINTS, method='mean'):
+        """
+        Usage for `appliances` over [start, end] on one shared time axis.
+
+        resolution: 'auto' picks the finest bin width that fits max_points;
+        an explicit resolution is kept and, if it has too many bins, bucketed
+        down to max_points with `method`:
+          'mean'   bucket mean of the bin totals
+          'minmax' bucket mean plus the min/max envelope (peaks survive downsampling)
+        """
+        max_points = int(min(max(max_points, 2), MAX_POINTS_LIMIT))
+        if method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+        if resolution != 'auto' and resolution not in RESOLUTIONS:
+            raise ValueError(f"resolution must be 'auto' or one of {', '.join(RESOLUTIONS)}")
+        if not all(isinstance(a, str) for a in appliances):
+            raise ValueError("appliances must be a list of appliance names")
+        unknown = [a for a in appliances if a not in self.appliance_index]
+        if unknown:
+            raise ValueError(f"Unknown appliances: {', '.join(unknown)}")
+
+        start = self.earliest if start is None else _parse_bound(start, 'start')
+        end = self.latest if end is None else _parse_bound(end, 'end')
+        if end < start:
+            raise ValueError("end must not be before start")
+
+        if resolution == 'auto':
+            resolution = self.choose_resolution(start, end, max_points)
+
+        lo, hi = self.slice(start, end)
+        columns = [self.appliance_index[a] for a in appliances]
+        bins, values = self.aggregate(lo, hi, resolution, columns)
+
+        result = {
+            'start': str(start),
+            'end': str(end),
+            'resolution': resolution,
+            'downsampled': False,
+            'timestamps': bins,
+            'series': {},
+        }
+
+        if len(bins) > max_points:
+            # Equal-count buckets over the bins; each bucket is labelled by its first bin
+            edges = np.linspace(0, len(bins), max_points + 1).astype(int)
+            starts = edges[:-1]
+            counts = np.diff(edges)
+            bucket_values = np.add.reduceat(values, starts, axis=0) / counts[:, None]
+            result['timestamps'] = bins[starts]
+            result['downsampled'] = True
+            for i, name in enumerate(appliances):
+                series = {'values': bucket_values[:, i]}
+                if method == 'minmax':
+                    series['min'] = np.minimum.reduceat(values[:, i], starts)
+                    series['max'] = np.maximum.reduceat(values[:, i], starts)
+                result['series'][name] = series
+        else:
+            for i, name in enumerate(appliances):
+                result['series'][name] = {'values': values[:, i]}
+
+        return result
+
+    def total(self, appliance_name, start=None, end=None):
+        """Total usage of one appliance over [start, end]."""
+        lo, hi = self.slice(start, end)
+        return float(self.values[lo:hi, self.appliance_index[appliance_name]].sum())
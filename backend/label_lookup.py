@@ -0,0 +1,64 @@
+"""
+Constant-time category encoding compiled from the LabelEncoders in encoders.pkl
+Avoids sklearn input validation + np.searchsorted for every single-value transform
+"""
+import numpy as np
+import pandas as pd
+
+# Code returned for a category the encoder never saw (when no fallback label applies)
+UNKNOWN_CODE = -1
+
+# Label to encode instead of an unseen category, per encoder.
+# The dataset has no 'spring' rows, so spring months borrow autumn (same as the statistical path).
+DEFAULT_FALLBACK_LABELS = {
+    'season': 'autumn',
+    'festival': 'No_Festival',
+}
+
+
+class CompiledEncoder:
+    """
+    Dict/array lookup table built once from a fitted LabelEncoder.
+    Unknown categories get `fallback_code` instead of raising.
+    """
+
+    def __init__(self, classes, fallback_label=None):
+        self.classes_ = np.asarray(classes)
+        self.lookup = {label: code for code, label in enumerate(self.classes_.tolist())}
+        self._index = pd.Index(self.classes_)
+        self.fallback_label = fallback_label
+        self.fallback_code = self.lookup.get(fallback_label, UNKNOWN_CODE)
+
+    @classmethod
+    def from_label_encoder(cls, encoder, fallback_label=None):
+        return cls(encoder.classes_, fallback_label=fallback_label)
+
+    def __contains__(self, label):
+        return label in self.lookup
+
+    def encode(self, label):
+        """Encode a single category."""
+        return self.lookup.get(label, self.fallback_code)
+
+    def encode_many(self, labels):
+        """Encode an array of categories in one vectorized hash lookup."""
+        codes = self._index.get_indexer(pd.Index(labels))
+        codes[codes == -1] = self.fallback_code
+        return codes
+
+    def decode(self, codes):
+        """Map codes back to category labels."""
+        return self.classes_[np.asarray(codes)]
+
+
+def compile_encoders(encoders, fallback_labels=None):
+    """
+    Compile a dict of fitted LabelEncoders (as stored in encoders.pkl)
+    into a dict of CompiledEncoder with the same keys.
+    """
+    if fallback_labels is None:
+        fallback_labels = DEFAULT_FALLBACK_LABELS
+    return {
+        name: CompiledEncoder.from_label_encoder(encoder, fallback_labels.get(name))
+        for name, encoder in encoders.items()
+    }
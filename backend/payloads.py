@@ -0,0 +1,146 @@
+"""
+Compact response encodings for chart payloads
+Negotiated via the Accept header:
+  application/json                     default, gzip/brotli compressed when accepted
+  application/x-usage-packed           packed float32 columns on a shared int64 time axis
+  application/vnd.apache.arrow.stream  Arrow IPC stream (needs pyarrow)
+"""
+import gzip
+import json
+import struct
+import importlib.util
+from flask import Response, jsonify
+# numpy and pyarrow are imported inside the encoders: this module is loaded at app startup
+# for the after_request compression hook, before the data layer (and numpy) is warm
+
+# Arrow responses are optional; only check pyarrow is installed, import it on first use
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+try:
+    import brotli
+except ImportError:  # fall back to gzip
+    brotli = None
+
+JSON_MIME = "application/json"
+PACKED_MIME = "application/x-usage-packed"
+ARROW_MIME = "application/vnd.apache.arrow.stream"
+
+PACKED_MAGIC = b"USGP"
+PACKED_VERSION = 1
+
+# Don't bother compressing tiny JSON bodies
+MIN_COMPRESS_BYTES = 1024
+
+
+class ColumnarPayload:
+    """
+    Chart data as columns on one shared time axis, plus JSON-able metadata.
+    `timestamps` is a DatetimeIndex; every column is a 1-D array of the same length.
+    """
+
+    def __init__(self, timestamps, columns, meta=None):
+        self.timestamps = timestamps
+        self.columns = columns
+        self.meta = meta or {}
+
+    def timestamps_ms(self):
+        """Time axis as int64 milliseconds since the Unix epoch."""
+        import numpy as np
+        return np.asarray(self.timestamps.as_unit('ms').asi8, dtype='<i8')
+
+
+def available_mimetypes():
+    """Response formats this server can produce, JSON first (the default)."""
+    mimetypes = [JSON_MIME, PACKED_MIME]
+    if HAS_PYARROW:
+        mimetypes.append(ARROW_MIME)
+    return mimetypes
+
+
+def negotiate(request):
+    """Best response format for the request's Accept header (JSON unless asked otherwise)."""
+    return request.accept_mimetypes.best_match(available_mimetypes(), default=JSON_MIME) or JSON_MIME
+
+
+def encode_packed(payload):
+    """
+    Packed layout (little-endian):
+      magic "USGP" | uint8 version | 3 pad bytes | uint32 header length | header JSON (utf-8)
+      | zero padding to an 8-byte boundary | int64[n] timestamps (ms) | float32[n] per column
+    The header lists {"length": n, "columns": [...names in order...], "meta": {...}}.
+    """
+    names = list(payload.columns)
+    header = json.dumps({
+        "length": len(payload.timestamps),
+        "columns": names,
+        "meta": payload.meta,
+    }, separators=(",", ":")).encode("utf-8")
+    import numpy as np
+    prefix = PACKED_MAGIC + struct.pack("<B3xI", PACKED_VERSION, len(header))
+    padding = -(len(prefix) + len(header)) % 8
+
+    parts = [prefix, header, b"\0" * padding, payload.timestamps_ms().tobytes()]
+    for name in names:
+        parts.append(np.asarray(payload.columns[name], dtype='<f4').tobytes())
+    return b"".join(parts)
+
+
+def encode_arrow(payload):
+    """Arrow IPC stream: a 'timestamp' column plus one float32 column per series."""
+    import numpy as np
+    import pyarrow as pa
+    arrays = [pa.array(payload.timestamps_ms(), type=pa.timestamp("ms"))]
+    names = ["timestamp"]
+    for name, values in payload.columns.items():
+        arrays.append(pa.array(np.asarray(values, dtype=np.float32)))
+        names.append(name)
+    table = pa.Table.from_arrays(arrays, names=names)
+    table = table.replace_schema_metadata({"meta": json.dumps(payload.meta)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def chart_response(request, payload, build_json):
+    """
+    Respond in the negotiated format.
+    `build_json` is only called for JSON responses, so binary clients skip list conversion.
+    """
+    mimetype = negotiate(request)
+    if mimetype == PACKED_MIME:
+        response = Response(encode_packed(payload), mimetype=PACKED_MIME)
+    elif mimetype == ARROW_MIME:
+        response = Response(encode_arrow(payload), mimetype=ARROW_MIME)
+    else:
+        response = jsonify(build_json())
+    response.vary.add("Accept")
+    return response
+
+
+def compress_response(request, response):
+    """
+    gzip/brotli-compress a finished JSON response when the client accepts it.
+    Binary chart payloads are already compact and left as-is.
+    """
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code >= 300
+            or "Content-Encoding" in response.headers
+            or response.mimetype != JSON_MIME):
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_BYTES:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        response.set_data(brotli.compress(body, quality=5))
+        response.headers["Content-Encoding"] = "br"
+    elif accepted["gzip"]:
+        response.set_data(gzip.compress(body, compresslevel=6))
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        return response
+    response.vary.add("Accept-Encoding")
+    return response
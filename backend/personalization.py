@@ -0,0 +1,104 @@
+"""
+Per-house personalized models
+train_house_models.py fits small compact forests per house (or per cluster of houses
+with similar usage profiles) and stores each partition's models as one shard file.
+Serving routes a request's house to its shard; shards are loaded lazily and kept in a
+bounded LRU cache, so thousands of houses never need to be in memory at once.
+
+Layout (inside a registry version, next to the pooled models):
+  house_routing.json             house -> partition, per-appliance holdout metrics
+  house_shard_<partition>.pkl    {appliance name: CompactForest}
+"""
+import os
+import json
+import pickle
+import threading
+from collections import OrderedDict
+
+ROUTING_FILE = "house_routing.json"
+SHARD_PREFIX = "house_shard_"
+
+# Personalized models leave out the house code: it is constant within a house and
+# dropping it keeps shards valid when train_models.py refits the house encoder
+PERSONAL_EXCLUDED_FEATURES = ('house_id_encoded',)
+
+# Shards held in memory per model version
+DEFAULT_SHARD_CACHE = 64
+
+
+def shard_filename(partition):
+    return f"{SHARD_PREFIX}{partition}.pkl"
+
+
+def is_shard_file(filename):
+    return filename.startswith(SHARD_PREFIX) and filename.endswith(".pkl")
+
+
+class HouseModelRouter:
+    """
+    Picks the personalized model for (house, appliance), or None to use the pooled model.
+    A personalized model is only routed to when it beat the pooled model on that
+    partition's time-ordered holdout (recorded by train_house_models.py).
+    """
+
+    def __init__(self, directory, routing, max_shards=DEFAULT_SHARD_CACHE):
+        self.directory = directory
+        self.mode = routing.get("mode", "house")
+        self.houses = routing.get("houses", {})
+        self.partitions = routing.get("partitions", {})
+        self.max_shards = max(1, int(max_shards))
+        self._shards = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, directory, max_shards=DEFAULT_SHARD_CACHE):
+        """Router for a model version, or None if it has no personalized models."""
+        path = os.path.join(directory, ROUTING_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return cls(directory, json.load(f), max_shards)
+
+    def partition(self, house_id):
+        return self.houses.get(str(house_id))
+
+    def model_for(self, house_id, appliance_name):
+        """(model, source label) for the house, or (None, None) to fall back to the pooled model."""
+        key = self.partition(house_id)
+        if key is None:
+            return None, None
+        info = self.partitions[key]["appliances"].get(appliance_name)
+        if not info or not info.get("use"):
+            return None, None
+        model = self._shard(key).get(appliance_name)
+        if model is None:
+            return None, None
+        return model, self.partitions[key]["label"]
+
+    def _shard(self, key):
+        """Load a shard on first use; evict the least recently used beyond max_shards."""
+        with self._lock:
+            shard = self._shards.get(key)
+            if shard is not None:
+                self._shards.move_to_end(key)
+                return shard
+            path = os.path.join(self.directory, shard_filename(key))
+            try:
+                with open(path, 'rb') as f:
+                    shard = pickle.load(f)
+            except Exception as e:
+                print(f"Error loading house model shard {key}: {e}")
+                shard = {}
+            self._shards[key] = shard
+            while len(self._shards) > self.max_shards:
+                self._shards.popitem(last=False)
+            return shard
+
+    def summary(self):
+        return {
+            "mode": self.mode,
+            "houses": len(self.houses),
+            "partitions": len(self.partitions),
+            "shardsLoaded": len(self._shards),
+            "maxShards": self.max_shards,
+        }
@@ -0,0 +1,412 @@
+"""
+Versioned model artifact registry
+Training writes each run to model/trained_models/versions/<version>/ with a manifest,
+then flips the CURRENT pointer atomically. The server watches the pointer, preloads
+the new version in the background and swaps it in without dropping requests.
+
+Layout:
+  trained_models/
+    CURRENT                      version id of the live version
+    versions/<version>/          *_model.pkl, encoders.pkl, feature_columns.pkl,
+                                 accuracies.json, ..., manifest.json
+Without a CURRENT pointer the flat files in trained_models/ are used (pre-registry layout).
+"""
+import os
+import json
+import time
+import shutil
+import pickle
+import hashlib
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: publishes are not serialized across processes
+    fcntl = None
+
+from appliances import model_filename
+from compression import COMPACT_MODEL_SUFFIX
+from features import load_feature_columns, validate_feature_columns
+from label_lookup import compile_encoders
+from personalization import DEFAULT_SHARD_CACHE, HouseModelRouter
+
+POINTER_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = ".publish.lock"
+ARTIFACT_EXTENSIONS = (".pkl", ".json")
+
+# Published versions kept on disk (the live one is never removed)
+DEFAULT_KEEP_VERSIONS = 5
+# How often the server checks the CURRENT pointer
+DEFAULT_POLL_SECONDS = 10
+
+
+def read_pointer(model_dir):
+    """Version id named by CURRENT, or None for the flat pre-registry layout."""
+    path = os.path.join(model_dir, POINTER_FILE)
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_current(model_dir):
+    """(version id, artifact directory) of the live models."""
+    version = read_pointer(model_dir)
+    if version is None:
+        return None, model_dir
+    return version, os.path.join(model_dir, VERSIONS_DIR, version)
+
+
+def _write_pointer(model_dir, version):
+    """Flip CURRENT to `version` atomically (write a temp file, then os.replace)."""
+    tmp_path = os.path.join(model_dir, f".{POINTER_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(model_dir, POINTER_FILE))
+
+
+class _PublishLock:
+    """Exclusive lock on model_dir/.publish.lock, held while a version is moved in and CURRENT flips."""
+
+    def __init__(self, model_dir):
+        self.path = os.path.join(model_dir, LOCK_FILE)
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        self.file.close()  # closing releases the lock
+
+
+def _version_order(version):
+    """Sort key for version ids: "<timestamp>" before "<timestamp>-2" before "<timestamp>-10"."""
+    timestamp, _, suffix = version.rpartition("-") if version.count("-") > 1 else (version, "", "")
+    return timestamp, int(suffix) if suffix.isdigit() else 1
+
+
+def _artifact_files(directory):
+    return sorted(
+        name for name in os.listdir(directory)
+        if name.endswith(ARTIFACT_EXTENSIONS) and name != MANIFEST_FILE
+        and os.path.isfile(os.path.join(directory, name))
+    )
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def verify_version(directory):
+    """Check every file listed in the manifest exists with the recorded size."""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise ValueError(f"No {MANIFEST_FILE} in {directory}")
+    for name, info in manifest["files"].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path) or os.path.getsize(path) != info["size"]:
+            raise ValueError(f"Artifact {name} in {directory} is missing or incomplete")
+    return manifest
+
+
+class VersionWriter:
+    """
+    Stage a new model version, seeded with the live version's artifacts so a
+    partial (batch) training run keeps every model it did not retrain.
+
+      writer = VersionWriter(MODEL_DIR, source="train_models.py batch 1")
+      with open(writer.path("ac_model.pkl"), 'wb') as f: ...
+      writer.publish()
+
+    The version id is claimed up front by creating its (empty) directory, so concurrent
+    runs never share one. publish() only succeeds if CURRENT still names the version
+    this writer was seeded from; otherwise another run published in between and this
+    one is discarded rather than silently dropping that run's models.
+    """
+
+    def __init__(self, model_dir, source=None, keep_versions=DEFAULT_KEEP_VERSIONS):
+        self.model_dir = model_dir
+        self.source = source
+        self.keep_versions = keep_versions
+        self.parent, parent_dir = resolve_current(model_dir)
+
+        versions_dir = os.path.join(model_dir, VERSIONS_DIR)
+        os.makedirs(versions_dir, exist_ok=True)
+        # os.mkdir is atomic: exactly one writer claims each version id
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        self.version = timestamp
+        suffix = 1
+        while True:
+            self.final_dir = os.path.join(versions_dir, self.version)
+            try:
+                os.mkdir(self.final_dir)
+                break
+            except FileExistsError:
+                suffix += 1
+                self.version = f"{timestamp}-{suffix}"
+        self.staging_dir = os.path.join(versions_dir, f".staging-{self.version}")
+        os.mkdir(self.staging_dir)
+
+        # Hard-link unchanged artifacts from the live version (copy if links are unsupported)
+        if os.path.isdir(parent_dir):
+            for name in _artifact_files(parent_dir):
+                src = os.path.join(parent_dir, name)
+                dst = os.path.join(self.staging_dir, name)
+                try:
+                    os.link(src, dst)
+                except OSError:
+                    shutil.copy2(src, dst)
+
+    def path(self, filename):
+        """Path to write an artifact to. Replaces (never modifies) any seeded file."""
+        path = os.path.join(self.staging_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)  # break the hard link so the parent version stays intact
+        return path
+
+    def remove(self, filename):
+        """Drop a seeded artifact that no longer matches this version (e.g. a stale compact model)."""
+        path = os.path.join(self.staging_dir, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def publish(self):
+        """
+        Write the manifest, move the version into place and flip CURRENT to it.
+        Raises RuntimeError (and discards the staged version) if CURRENT moved since
+        this writer was created.
+        """
+        try:
+            self._write_manifest()
+            with _PublishLock(self.model_dir):
+                live = read_pointer(self.model_dir)
+                if live != self.parent:
+                    raise RuntimeError(
+                        f"Model version {live} was published while this run was staged on "
+                        f"{self.parent or 'unversioned'}; rerun to build on it"
+                    )
+                # Replaces the empty directory that claimed the version id
+                os.rename(self.staging_dir, self.final_dir)
+                _write_pointer(self.model_dir, self.version)
+        except BaseException:
+            self.discard()
+            raise
+        self._prune()
+        return self.version
+
+    def _write_manifest(self):
+        files = {
+            name: {
+                "size": os.path.getsize(os.path.join(self.staging_dir, name)),
+                "sha256": _sha256(os.path.join(self.staging_dir, name)),
+            }
+            for name in _artifact_files(self.staging_dir)
+        }
+        manifest = {
+            "version": self.version,
+            "parent": self.parent,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "source": self.source,
+            "files": files,
+        }
+        with open(os.path.join(self.staging_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    def discard(self):
+        """Drop the staged version and release its version id without publishing."""
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        if read_manifest(self.final_dir) is None:
+            shutil.rmtree(self.final_dir, ignore_errors=True)
+
+    def _prune(self):
+        versions_dir = os.path.join(self.model_dir, VERSIONS_DIR)
+        # Directories without a manifest are version ids claimed by runs still staging
+        published = sorted((
+            name for name in os.listdir(versions_dir)
+            if not name.startswith(".") and read_manifest(os.path.join(versions_dir, name)) is not None
+        ), key=_version_order)
+        live = read_pointer(self.model_dir)
+        for name in published[:-self.keep_versions] if self.keep_versions else []:
+            if name != live:
+                shutil.rmtree(os.path.join(versions_dir, name), ignore_errors=True)
+
+
+class ModelSet:
+    """
+    One immutable model version as served: encoders, accuracies and a lazy model cache.
+    Requests take a reference once, so a swap never mixes artifacts from two versions.
+    """
+
+    def __init__(self, version, directory, appliance_names, prefer_compact=False,
+                 house_shard_cache=DEFAULT_SHARD_CACHE):
+        self.version = version
+        self.directory = directory
+        self.models = {}  # Cache of loaded models
+        self._lock = threading.Lock()
+
+        # Map appliance name to model path for lazy loading
+        self.model_paths = {}
+        for name in appliance_names:
+            path = os.path.join(directory, model_filename(name))
+            compact_path = os.path.join(directory, model_filename(name, COMPACT_MODEL_SUFFIX))
+            # Serve pruned/quantized forests from compress_models.py when asked (low-memory boxes)
+            if prefer_compact and os.path.exists(compact_path):
+                path = compact_path
+            self.model_paths[name] = path
+
+        self.encoders = {}
+        self.accuracies = {}
+        try:
+            # Load encoders (small, safe to load at startup)
+            encoders_path = os.path.join(directory, "encoders.pkl")
+            if os.path.exists(encoders_path):
+                with open(encoders_path, 'rb') as f:
+                    self.encoders = pickle.load(f)
+
+            # Check the saved feature layout matches the shared pipeline (train/serve skew guard)
+            saved_feature_columns = load_feature_columns(directory)
+            if saved_feature_columns is not None:
+                try:
+                    validate_feature_columns(saved_feature_columns)
+                except ValueError as e:
+                    print(f"Warning: {e}; disabling ML predictions")
+                    self.encoders = {}
+
+            # Load accuracies (metadata only)
+            accuracies_path = os.path.join(directory, "accuracies.json")
+            if os.path.exists(accuracies_path):
+                with open(accuracies_path, 'r') as f:
+                    self.accuracies = json.load(f)
+        except Exception as e:
+            print(f"Warning: Could not load encoders/accuracies: {e}")
+            print("Will use statistical prediction instead")
+
+        # Encoders compiled into constant-time lookup tables
+        self.encoder_lookup = compile_encoders(self.encoders)
+
+        # Per-house personalized models from train_house_models.py (shards load on demand)
+        self.house_router = None
+        try:
+            self.house_router = HouseModelRouter.open(directory, house_shard_cache)
+        except Exception as e:
+            print(f"Warning: Could not load house model routing: {e}")
+
+    def count_models_on_disk(self):
+        """Count how many trained model files exist on disk."""
+        return sum(1 for p in self.model_paths.values() if p and os.path.exists(p))
+
+    def has_encoders_on_disk(self):
+        """Whether the encoders.pkl exists on disk (required to use ML path)."""
+        return os.path.exists(os.path.join(self.directory, "encoders.pkl"))
+
+    def using_ml(self):
+        # ML can be available even if models aren't loaded yet (lazy loading).
+        return bool(self.count_models_on_disk() > 0 and (self.encoders or self.has_encoders_on_disk()))
+
+    def load_model(self, appliance_name):
+        """
+        Lazily load a model for the given appliance.
+        Returns the model instance or None if not available.
+        """
+        model = self.models.get(appliance_name)
+        if model is not None:
+            return model
+
+        model_path = self.model_paths.get(appliance_name)
+        if not model_path or not os.path.exists(model_path):
+            return None
+
+        with self._lock:
+            if appliance_name in self.models:
+                return self.models[appliance_name]
+            try:
+                with open(model_path, 'rb') as f:
+                    self.models[appliance_name] = pickle.load(f)
+                print(f"Loaded model for {appliance_name} (version {self.version or 'unversioned'})")
+                return self.models[appliance_name]
+            except Exception as e:
+                print(f"Error loading model for {appliance_name}: {e}")
+                return None
+
+    def preload(self):
+        """Load every model on disk (used before swapping a new version in)."""
+        for name in self.model_paths:
+            self.load_model(name)
+
+
+class ModelRegistry:
+    """
+    Serves the live ModelSet and hot-swaps it when CURRENT changes.
+    `registry.current` is replaced by a single reference assignment, so readers
+    always see either the old or the fully preloaded new version.
+    """
+
+    def __init__(self, model_dir, appliance_names, prefer_compact=False,
+                 poll_seconds=DEFAULT_POLL_SECONDS, house_shard_cache=DEFAULT_SHARD_CACHE):
+        self.model_dir = model_dir
+        self.appliance_names = list(appliance_names)
+        self.prefer_compact = prefer_compact
+        self.house_shard_cache = house_shard_cache
+        self.poll_seconds = poll_seconds
+        self._swap_lock = threading.Lock()
+        self._watcher = None
+        self.current = self._open(*resolve_current(model_dir))
+
+    def _open(self, version, directory):
+        return ModelSet(version, directory, self.appliance_names, self.prefer_compact,
+                        self.house_shard_cache)
+
+    def check_for_update(self):
+        """
+        Swap in the version named by CURRENT if it differs from the live one.
+        The new version is verified against its manifest and fully preloaded first.
+        Returns True if a swap happened.
+        """
+        version, directory = resolve_current(self.model_dir)
+        if version == self.current.version:
+            return False
+        with self._swap_lock:
+            if version == self.current.version:
+                return False
+            if version is not None:
+                verify_version(directory)
+            new_set = self._open(version, directory)
+            new_set.preload()
+            old_version = self.current.version
+            self.current = new_set
+        print(f"Swapped models: version {old_version or 'unversioned'} → {version}")
+        return True
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.check_for_update()
+            except Exception as e:
+                print(f"Warning: could not load new model version: {e}")
+
+    def start_watcher(self):
+        """Poll CURRENT in a daemon thread."""
+        if self._watcher is None and self.poll_seconds > 0:
+            self._watcher = threading.Thread(target=self._watch, name="model-registry", daemon=True)
+            self._watcher.start()
@@ -0,0 +1,103 @@
+"""
+Startup helpers: phase timing and one-shot lazy / background loading
+Kept free of heavy imports so the Flask app can come up in milliseconds
+"""
+import time
+import threading
+
+
+class StartupTimer:
+    """Records how long each named cold-start phase took."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self._lock = threading.Lock()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def record(self, name, seconds):
+        with self._lock:
+            self.phases.append({"phase": name, "seconds": round(seconds, 4)})
+
+    def report(self):
+        with self._lock:
+            phases = list(self.phases)
+        return {
+            "phases": phases,
+            "totalSeconds": round(sum(p["seconds"] for p in phases), 4),
+        }
+
+    def print_report(self, title="Startup timing"):
+        report = self.report()
+        print(f"{title}:")
+        for p in report["phases"]:
+            print(f"  {p['phase']:<32} {p['seconds'] * 1000:8.1f} ms")
+        print(f"  {'total':<32} {report['totalSeconds'] * 1000:8.1f} ms")
+
+
+class _Phase:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class LazyLoader:
+    """
+    Runs `load()` exactly once, either on the first get() or ahead of time in a
+    background thread. get() blocks until the value is ready and re-raises a load error.
+    """
+
+    def __init__(self, load, name="loader"):
+        self._load = load
+        self.name = name
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._started = False
+        self._value = None
+        self._error = None
+
+    @property
+    def ready(self):
+        return self._done.is_set() and self._error is None
+
+    @property
+    def failed(self):
+        return self._done.is_set() and self._error is not None
+
+    def _run(self):
+        try:
+            self._value = self._load()
+        except Exception as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def _claim(self):
+        with self._lock:
+            if self._started:
+                return False
+            self._started = True
+            return True
+
+    def start_background(self):
+        """Begin loading in a daemon thread (no-op if already started)."""
+        if self._claim():
+            threading.Thread(target=self._run, name=self.name, daemon=True).start()
+
+    def get(self):
+        if self._claim():
+            self._run()
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
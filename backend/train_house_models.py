@@ -0,0 +1,238 @@
+"""
+Train personalized appliance models per house (or per cluster of similar houses)
+Each partition gets small forests fitted on its own rows, pruned and quantized into
+one shard file (see personalization.py). Partitions train in parallel; features are
+built once for the whole dataset and partitions take row slices of them.
+
+Usage:
+  python backend/train_house_models.py        # one model set per house
+  python backend/train_house_models.py 8      # 8 clusters of houses with similar hourly usage
+
+Run after train_models.py: uses its encoders and compares each personalized model
+against the pooled model on the partition's latest 20% of readings. Serving only
+routes a house to a personalized model that beat the pooled one.
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.ensemble import RandomForestRegressor
+import warnings
+warnings.filterwarnings('ignore')
+
+from appliances import APPLIANCE_COLUMNS, model_filename
+from features import FEATURE_COLUMNS, add_time_features
+from label_lookup import compile_encoders
+from compression import CompactForest, forest_tree_predictions, smallest_tree_count
+from evaluation import regression_metrics, time_ordered_split
+from personalization import (
+    PERSONAL_EXCLUDED_FEATURES, ROUTING_FILE, is_shard_file, shard_filename,
+)
+from registry import VersionWriter, resolve_current
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_PATH = os.path.join(BASE_DIR, "model", "appliance_usage_dataset.csv")
+MODEL_DIR = os.path.join(BASE_DIR, "model", "trained_models")
+
+# Small forests: one partition's models must stay cheap to store and load
+HOUSE_MODEL_PARAMS = {
+    'n_estimators': 60,
+    'max_depth': 12,
+    'min_samples_leaf': 3,
+    'max_features': 'sqrt',
+}
+# R² a personalized forest may give up when pruned (see compression.py)
+HOUSE_R2_TOLERANCE = 0.005
+# Partitions with fewer readings than this are left to the pooled model
+MIN_PARTITION_ROWS = 500
+
+n_clusters = 0
+try:
+    if len(sys.argv) > 1:
+        n_clusters = int(sys.argv[1])
+except ValueError:
+    print("Usage: python backend/train_house_models.py [n_clusters]")
+    sys.exit(1)
+
+current_version, current_dir = resolve_current(MODEL_DIR)
+encoders_path = os.path.join(current_dir, "encoders.pkl")
+if not os.path.exists(encoders_path):
+    print("Error: encoders.pkl not found, run train_models.py first")
+    sys.exit(1)
+with open(encoders_path, 'rb') as f:
+    encoder_lookup = compile_encoders(pickle.load(f))
+
+# Shared features for every partition, built once
+print("Loading data...")
+data = pd.read_csv(DATA_PATH)
+data['timestamp'] = pd.to_datetime(data['timestamp'], dayfirst=True)
+data['festival'] = data['festival'].fillna('No_Festival')
+add_time_features(data)
+data['house_id_encoded'] = encoder_lookup['house'].encode_many(data['house_id'])
+data['season_encoded'] = encoder_lookup['season'].encode_many(data['season'])
+data['festival_encoded'] = encoder_lookup['festival'].encode_many(data['festival'])
+X = data[FEATURE_COLUMNS]
+personal_columns = [c for c in FEATURE_COLUMNS if c not in PERSONAL_EXCLUDED_FEATURES]
+timestamps = data['timestamp'].to_numpy()
+appliances = [(name, col) for name, col in APPLIANCE_COLUMNS.items() if col in data.columns]
+targets = data[[col for _, col in appliances]].to_numpy(dtype=np.float64)
+
+# Partition houses: each house on its own, or k-means over hourly usage profiles
+house_ids = data['house_id'].astype(str)
+houses = sorted(house_ids.unique())
+if n_clusters > 0:
+    from sklearn.cluster import KMeans
+    # Mean usage per (hour, appliance) per house, standardized across houses
+    profile = data.groupby([house_ids, 'Hour'])[[col for _, col in appliances]].mean().unstack('Hour')
+    profile = profile.reindex(houses).fillna(0.0).to_numpy()
+    std = profile.std(axis=0)
+    profile = (profile - profile.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    n_clusters = min(n_clusters, len(houses))
+    labels = KMeans(n_clusters=n_clusters, n_init=10, random_state=42).fit_predict(profile)
+    partition_of = {house: f"c{label}" for house, label in zip(houses, labels)}
+    partition_labels = {f"c{label}": f"cluster:{label}" for label in set(labels)}
+    mode = "cluster"
+else:
+    partition_of = {house: f"h{i}" for i, house in enumerate(houses)}
+    partition_labels = {f"h{i}": f"house:{house}" for i, house in enumerate(houses)}
+    mode = "house"
+
+partition_ids = house_ids.map(partition_of)
+partition_rows = partition_ids.groupby(partition_ids).indices
+partitions = {}
+for key, rows in partition_rows.items():
+    if len(rows) < MIN_PARTITION_ROWS:
+        print(f"  - {partition_labels[key]}: {len(rows)} readings, left to the pooled model")
+        continue
+    train_idx, test_idx = time_ordered_split(timestamps[rows], test_size=0.2)
+    partitions[key] = (rows[train_idx], rows[test_idx])
+
+if not partitions:
+    print(f"No partition has {MIN_PARTITION_ROWS}+ readings, nothing to train")
+    sys.exit(0)
+
+# Pooled model predictions on every partition's holdout rows, one batch per appliance
+# (models loaded one at a time, so memory stays at one pooled forest)
+all_test = np.concatenate([test for _, test in partitions.values()])
+test_offsets = {}
+offset = 0
+for key, (_, test) in partitions.items():
+    test_offsets[key] = (offset, offset + len(test))
+    offset += len(test)
+
+pooled_predictions = {}
+for name, _ in appliances:
+    model_path = os.path.join(current_dir, model_filename(name))
+    if not os.path.exists(model_path):
+        continue
+    with open(model_path, 'rb') as f:
+        pooled = pickle.load(f)
+    X_test = X.iloc[all_test]
+    if hasattr(pooled, 'feature_names_in_'):
+        X_test = X_test[list(pooled.feature_names_in_)]
+    pooled_predictions[name] = pooled.predict(X_test).astype(np.float32)
+    del pooled
+
+
+def train_partition(key, train_idx, test_idx, shard_path):
+    """
+    Fit, prune and quantize one model per appliance for a partition and write its shard.
+    Returns only metrics; the models are dropped once written.
+    """
+    start = time.perf_counter()
+    X_train = X.iloc[train_idx][personal_columns]
+    X_test = X.iloc[test_idx][personal_columns]
+    # Constant columns within a partition (e.g. Year for a short history) carry no signal
+    X_train = X_train.loc[:, X_train.var() > 0]
+    X_test = X_test[X_train.columns]
+    lo, hi = test_offsets[key]
+
+    shard = {}
+    metrics = {}
+    for a, (name, _) in enumerate(appliances):
+        y_train, y_test = targets[train_idx, a], targets[test_idx, a]
+        if y_train.var() == 0 or len(y_test) < 2:
+            continue
+        forest = RandomForestRegressor(**HOUSE_MODEL_PARAMS, random_state=42, n_jobs=1)
+        forest.fit(X_train, y_train)
+        n_trees, _ = smallest_tree_count(
+            forest_tree_predictions(forest, X_test), y_test, HOUSE_R2_TOLERANCE
+        )
+        compact = CompactForest(forest, n_trees=n_trees)
+        scores = regression_metrics(y_test, compact.predict(X_test))
+
+        pooled_r2 = None
+        if name in pooled_predictions:
+            pooled_r2 = regression_metrics(y_test, pooled_predictions[name][lo:hi])['r2']
+        shard[name] = compact
+        metrics[name] = {
+            'r2': scores['r2'],
+            'mae': scores['mae'],
+            'pooled_r2': pooled_r2,
+            'trees': compact.n_estimators,
+            # Route to the personalized model only where it beats the pooled one
+            'use': scores['r2'] > (pooled_r2 if pooled_r2 is not None else 0.0),
+        }
+
+    with open(shard_path, 'wb') as f:
+        pickle.dump(shard, f)
+    return key, metrics, time.perf_counter() - start
+
+
+writer = VersionWriter(
+    MODEL_DIR, source=f"train_house_models.py ({mode}) from {current_version or 'unversioned'}"
+)
+# Shards from an earlier personalization run must not leak into this version
+for name in os.listdir(writer.staging_dir):
+    if is_shard_file(name):
+        writer.remove(name)
+
+print(f"\nTraining {mode} models for {len(partitions)} partitions "
+      f"({len(houses)} houses, {len(appliances)} appliances)...")
+print("=" * 60)
+try:
+    # Threads share the feature matrix (tree fitting releases the GIL); one partition per task
+    results = Parallel(n_jobs=-1, prefer='threads')(
+        delayed(train_partition)(key, train_idx, test_idx, writer.path(shard_filename(key)))
+        for key, (train_idx, test_idx) in partitions.items()
+    )
+except Exception:
+    writer.discard()
+    raise
+
+routing = {
+    "mode": mode,
+    "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    "pooled_version": current_version,
+    "params": dict(HOUSE_MODEL_PARAMS, r2_tolerance=HOUSE_R2_TOLERANCE),
+    "houses": {house: key for house, key in partition_of.items() if key in partitions},
+    "partitions": {},
+}
+members_of = {}
+for house, key in partition_of.items():
+    members_of.setdefault(key, []).append(house)
+for key, metrics, seconds in results:
+    members = members_of[key]
+    routing["partitions"][key] = {
+        "label": partition_labels[key],
+        "houses": members,
+        "rows": int(len(partitions[key][0]) + len(partitions[key][1])),
+        "fit_seconds": seconds,
+        "appliances": metrics,
+    }
+    used = sum(1 for m in metrics.values() if m['use'])
+    mean_gain = np.mean([m['r2'] - m['pooled_r2'] for m in metrics.values()
+                         if m['pooled_r2'] is not None] or [0.0])
+    print(f"  ✓ {partition_labels[key]}: {len(members)} houses, {used}/{len(metrics)} appliances "
+          f"personalized, mean R² gain {mean_gain:+.4f} ({seconds:.1f}s)")
+
+with open(writer.path(ROUTING_FILE), 'w') as f:
+    json.dump(routing, f, indent=2)
+version = writer.publish()
+
+print("\n" + "=" * 60)
+print(f"Published model version {version} with {len(results)} house model shards and {ROUTING_FILE}")
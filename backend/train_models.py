@@ -8,13 +8,24 @@ import numpy as np
 import pickle
 import os
 import sys
-from sklearn.model_selection import train_test_split, GridSearchCV, cross_val_score
+from sklearn.model_selection import GridSearchCV, cross_val_score
 from sklearn.preprocessing import LabelEncoder
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.metrics import r2_score
 import warnings
 warnings.filterwarnings('ignore')
 
+from appliances import model_filename
+from features import (
+    FEATURE_COLUMNS, FEATURE_COLUMNS_FILE, add_time_features, save_feature_columns,
+)
+from compression import COMPACT_MODEL_SUFFIX, REPORT_FILE
+from personalization import ROUTING_FILE
+from registry import VersionWriter, resolve_current
+from evaluation import (
+    BACKTEST_FILE, DEFAULT_BACKTEST_FOLDS, backtest, regression_metrics, time_ordered_split,
+)
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "model", "appliance_usage_dataset.csv")
 MODEL_DIR = os.path.join(BASE_DIR, "model", "trained_models")
@@ -26,20 +37,11 @@ data = pd.read_csv(DATA_PATH)
 
 # Preprocess
 data['timestamp'] = pd.to_datetime(data['timestamp'], dayfirst=True)
-data['Hour'] = data['timestamp'].dt.hour
-data['Day'] = data['timestamp'].dt.day
-data['Month'] = data['timestamp'].dt.month
-data['Year'] = data['timestamp'].dt.year
-data['DayOfWeek'] = data['timestamp'].dt.dayofweek  # 0=Monday, 6=Sunday
-data['IsWeekend'] = (data['DayOfWeek'] >= 5).astype(int)
 data['festival'] = data['festival'].fillna('No_Festival')
 
-# Feature Engineering: Cyclic encoding for hour and month
-# This helps the model understand that hour 23 is close to hour 0
-data['Hour_sin'] = np.sin(2 * np.pi * data['Hour'] / 24)
-data['Hour_cos'] = np.cos(2 * np.pi * data['Hour'] / 24)
-data['Month_sin'] = np.sin(2 * np.pi * data['Month'] / 12)
-data['Month_cos'] = np.cos(2 * np.pi * data['Month'] / 12)
+# Feature Engineering: calendar columns plus cyclic encoding for hour and month
+# (shared with app.py so training and serving build identical features)
+add_time_features(data)
 
 # Encode categorical variables
 le_house = LabelEncoder()
@@ -50,13 +52,15 @@ data['season_encoded'] = le_season.fit_transform(data['season'])
 data['festival_encoded'] = le_festival.fit_transform(data['festival'])
 
 # Enhanced features with cyclic encoding and additional features
-feature_cols = [
-    'house_id_encoded', 'season_encoded', 'festival_encoded',
-    'Hour', 'Day', 'Month', 'Year',
-    'DayOfWeek', 'IsWeekend',
-    'Hour_sin', 'Hour_cos', 'Month_sin', 'Month_cos'
-]
+feature_cols = list(FEATURE_COLUMNS)
 X = data[feature_cols]
+timestamps = data['timestamp'].to_numpy()
+
+# Time-ordered holdout: test on the latest 20% of the timeline so no future rows leak into training
+train_idx, test_idx = time_ordered_split(timestamps, test_size=0.2)
+
+# Rolling-origin backtest folds per appliance (BACKTEST_FOLDS=0 disables)
+backtest_folds = int(os.environ.get("BACKTEST_FOLDS", DEFAULT_BACKTEST_FOLDS))
 
 # 20 appliances to train (removed: Iron, Hair Dryer, Vacuum, Coffee Maker, Toaster, Blender, Kettle, Router, Security, Smart Hub)
 # Organized in batches of 4
@@ -104,13 +108,20 @@ else:
 models = {}
 encoders = {}
 accuracies = {}
+backtests = {}
 
-# Load existing accuracies if they exist
-accuracies_path = os.path.join(MODEL_DIR, "accuracies.json")
+# Load existing accuracies from the live model version if they exist
+_, current_model_dir = resolve_current(MODEL_DIR)
+accuracies_path = os.path.join(current_model_dir, "accuracies.json")
 if os.path.exists(accuracies_path):
     import json
     with open(accuracies_path, 'r') as f:
         accuracies = json.load(f)
+backtest_path = os.path.join(current_model_dir, BACKTEST_FILE)
+if os.path.exists(backtest_path):
+    import json
+    with open(backtest_path, 'r') as f:
+        backtests = json.load(f)
 
 print("\nTraining models for each appliance...")
 print("=" * 60)
@@ -119,8 +130,10 @@ def find_best_model(X_train, y_train, X_test, y_test, appliance_name):
     """
     Train a reasonably strong model with a **small** set of configs
     to keep training fast but still accurate.
+    Also returns the best model's test predictions so metrics need no second predict pass.
     """
     best_model = None
+    best_pred = None
     best_r2 = -float('inf')
     best_params = None
     best_model_type = None
@@ -133,7 +146,7 @@ def find_best_model(X_train, y_train, X_test, y_test, appliance_name):
     # Check if target has variance
     if y_train.var() == 0:
         print(f"  ⚠ Warning: Target variable has zero variance, skipping...")
-        return None, -float('inf'), None, None
+        return None, -float('inf'), None, None, None
     
     # Fast strategy: a **small** set of RandomForest configs
     print(f"  Training RandomForest (fast config search)...")
@@ -188,19 +201,20 @@ def find_best_model(X_train, y_train, X_test, y_test, appliance_name):
             if r2 > best_r2:
                 best_r2 = r2
                 best_model = model
+                best_pred = pred
                 best_params = params
                 best_model_type = 'RandomForest'
 
             # If we get very good performance, stop trying more configs
             if r2 >= 0.88:
                 print(f"    ✓ Early stop: R² = {r2:.4f} ({r2*100:.2f}%) with params {params}")
-                return best_model, best_r2, best_params, best_model_type
+                return best_model, best_r2, best_params, best_model_type, best_pred
         except Exception:
             continue
 
     if best_model is not None:
         print(f"    ✓ Best RandomForest R² = {best_r2:.4f} ({best_r2*100:.2f}%) with params {best_params}")
-    return best_model, best_r2, best_params, best_model_type
+    return best_model, best_r2, best_params, best_model_type, best_pred
 
 batch_counter = 0
 for batch in batches_to_train:
@@ -219,11 +233,12 @@ for batch in batches_to_train:
             print(f"  ⚠ Warning: {appliance_name} has no variance or all zeros, skipping...")
             continue
         
-        # Train/test split
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+        # Train/test split (time-ordered)
+        X_train, X_test = X.iloc[train_idx], X.iloc[test_idx]
+        y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
         
         # Find best model
-        best_model, best_r2, best_params, best_model_type = find_best_model(
+        best_model, best_r2, best_params, best_model_type, best_pred = find_best_model(
             X_train, y_train, X_test, y_test, appliance_name
         )
         
@@ -231,10 +246,27 @@ for batch in batches_to_train:
             print(f"  ✗ Failed to train model for {appliance_name}")
             continue
         
-        # Calculate metrics
-        pred = best_model.predict(X_test)
-        mae = mean_absolute_error(y_test, pred)
-        rmse = np.sqrt(mean_squared_error(y_test, pred))
+        # Calculate metrics (reusing the holdout predictions from model selection)
+        metrics = regression_metrics(y_test, best_pred)
+        mae = metrics['mae']
+        rmse = metrics['rmse']
+        
+        # Rolling-origin backtest of the chosen config, folds fitted in parallel
+        # (results from the previous model are dropped, even when backtests are disabled)
+        backtest_r2 = None
+        backtests.pop(appliance_name, None)
+        if backtest_folds > 0:
+            print(f"  Backtesting over {backtest_folds} time-ordered folds...")
+            result = backtest(
+                best_model, X[list(best_model.feature_names_in_)], y, timestamps, backtest_folds
+            )
+            result['params'] = best_params
+            backtests[appliance_name] = result
+            if result['mean']:
+                backtest_r2 = result['mean']['r2']
+                for fold in result['folds']:
+                    print(f"    Fold {fold['fold']}: R² {fold['r2']:.4f}, MAE {fold['mae']:.4f} "
+                          f"(fit {fold['fit_seconds']:.1f}s, test from {fold['test_start'][:10]})")
         
         # Store model with feature columns info
         models[appliance_name] = {
@@ -248,6 +280,8 @@ for batch in batches_to_train:
             'r2_percent': float(best_r2 * 100),
             'mae': float(mae),
             'rmse': float(rmse),
+            'backtest_r2': backtest_r2,
+            'split': 'time',
             'model_type': best_model_type,
             'params': best_params
         }
@@ -257,14 +291,21 @@ for batch in batches_to_train:
         print(f"    R² Score: {best_r2:.4f} ({best_r2*100:.2f}%)")
         print(f"    MAE: {mae:.4f}")
         print(f"    RMSE: {rmse:.4f}")
+        if backtest_r2 is not None:
+            print(f"    Backtest R² (mean): {backtest_r2:.4f}")
         print(f"    Model Type: {best_model_type}")
 
-# Save models and encoders
+# Save models and encoders into a new registry version
+# (seeded with the live version, so models from other batches carry over)
 print("\n" + "=" * 60)
 print("Saving models...")
+writer = VersionWriter(
+    MODEL_DIR, source=f"train_models.py batch {batch_num}" if batch_num else "train_models.py"
+)
 
 for appliance_name, model_data in models.items():
-    model_path = os.path.join(MODEL_DIR, f"{appliance_name.lower().replace(' ', '_')}_model.pkl")
+    model_path = writer.path(model_filename(appliance_name))
+    writer.remove(model_filename(appliance_name, COMPACT_MODEL_SUFFIX))
     # Save the model object (extract from dict if needed)
     model_to_save = model_data['model'] if isinstance(model_data, dict) else model_data
     with open(model_path, 'wb') as f:
@@ -272,7 +313,7 @@ for appliance_name, model_data in models.items():
     print(f"  ✓ Saved {appliance_name} model")
 
 # Save encoders
-encoders_path = os.path.join(MODEL_DIR, "encoders.pkl")
+encoders_path = writer.path("encoders.pkl")
 with open(encoders_path, 'wb') as f:
     pickle.dump({
         'house': le_house,
@@ -282,18 +323,66 @@ with open(encoders_path, 'wb') as f:
 print(f"  ✓ Saved encoders")
 
 # Save feature columns info
-features_path = os.path.join(MODEL_DIR, "feature_columns.pkl")
-with open(features_path, 'wb') as f:
-    pickle.dump(feature_cols, f)
+writer.path(FEATURE_COLUMNS_FILE)
+save_feature_columns(writer.staging_dir, feature_cols)
 print(f"  ✓ Saved feature columns")
 
-# Save accuracies (merge with existing if training specific batch)
-accuracies_path = os.path.join(MODEL_DIR, "accuracies.json")
+# Merge this run's metrics into the seeded version's files: they were read when the run
+# started, and another batch may have published since
 import json
+for filename, merged in (("accuracies.json", accuracies), (BACKTEST_FILE, backtests)):
+    seeded_path = os.path.join(writer.staging_dir, filename)
+    if os.path.exists(seeded_path):
+        with open(seeded_path, 'r') as f:
+            seeded = json.load(f)
+        for name in models:
+            seeded.pop(name, None)
+            if name in merged:
+                seeded[name] = merged[name]
+        merged.clear()
+        merged.update(seeded)
+
+# Seeded compression stats and personalized-vs-pooled comparisons describe the replaced models
+report_path = os.path.join(writer.staging_dir, REPORT_FILE)
+if os.path.exists(report_path):
+    with open(report_path, 'r') as f:
+        report = {name: stats for name, stats in json.load(f).items() if name not in models}
+    if report:
+        with open(writer.path(REPORT_FILE), 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        writer.remove(REPORT_FILE)
+routing_path = os.path.join(writer.staging_dir, ROUTING_FILE)
+if os.path.exists(routing_path):
+    with open(routing_path, 'r') as f:
+        routing = json.load(f)
+    # Stop routing retrained appliances to personalized models until train_house_models.py reruns
+    for partition in routing.get("partitions", {}).values():
+        for name, info in partition.get("appliances", {}).items():
+            if name in models:
+                info["use"] = False
+                info["stale"] = True
+    with open(writer.path(ROUTING_FILE), 'w') as f:
+        json.dump(routing, f, indent=2)
+
+# Save accuracies (merge with existing if training specific batch)
+accuracies_path = writer.path("accuracies.json")
 with open(accuracies_path, 'w') as f:
     json.dump(accuracies, f, indent=2)
 print(f"  ✓ Saved accuracies")
 
+# Save per-fold backtest metrics and timings next to accuracies.json
+if backtests:
+    with open(writer.path(BACKTEST_FILE), 'w') as f:
+        json.dump(backtests, f, indent=2)
+    print(f"  ✓ Saved backtest results")
+else:
+    writer.remove(BACKTEST_FILE)  # no backtested models left; don't carry over the old file
+
+# Flip the CURRENT pointer; running servers pick the new version up without a restart
+version = writer.publish()
+print(f"  ✓ Published model version {version}")
+
 print("\n" + "=" * 60)
 if batch_num:
     print(f"Batch {batch_num} training complete!")
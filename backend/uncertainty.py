@@ -0,0 +1,46 @@
+"""
+Prediction intervals from the spread of a forest's per-tree predictions
+Every tree is evaluated in one pass (forest.apply + leaf gather, see compression.py),
+which costs the same as the point prediction it replaces
+"""
+import math
+import numpy as np
+
+from compression import CompactForest, forest_tree_predictions
+
+# 90% band plus the median
+DEFAULT_QUANTILES = (0.05, 0.5, 0.95)
+
+
+def supports_intervals(model):
+    """Whether per-tree predictions are available (sklearn forests and CompactForest)."""
+    return isinstance(model, CompactForest) or hasattr(model, 'estimators_')
+
+
+def validate_quantiles(quantiles):
+    """Sorted tuple of quantiles in [0, 1]; raises ValueError otherwise."""
+    try:
+        values = sorted(float(q) for q in quantiles)
+    except (TypeError, ValueError):
+        raise ValueError("quantiles must be a list of numbers between 0 and 1")
+    # NaN compares false against both bounds, so check finiteness explicitly
+    if not values or not all(math.isfinite(q) for q in values) or values[0] < 0 or values[-1] > 1:
+        raise ValueError("quantiles must be a list of numbers between 0 and 1")
+    return tuple(values)
+
+
+def predict_with_intervals(model, X, quantiles=DEFAULT_QUANTILES, pooled=False):
+    """
+    Point prediction plus quantiles across trees, from one per-tree pass over X.
+
+    pooled=False: per-row results, (point (n_samples,), bands (n_quantiles, n_samples)).
+    pooled=True:  each tree's predictions are averaged over all rows first (e.g. every
+                  hour of a day), giving (point scalar, bands (n_quantiles,)) for that average.
+    The point prediction equals model.predict(X) (or its mean when pooled).
+    """
+    tree_predictions = forest_tree_predictions(model, X)  # (n_trees, n_samples)
+    if pooled:
+        tree_predictions = tree_predictions.mean(axis=1)
+    point = tree_predictions.mean(axis=0)
+    bands = np.quantile(tree_predictions, quantiles, axis=0)
+    return point, bands